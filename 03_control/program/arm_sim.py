@@ -0,0 +1,90 @@
+import time
+import collections
+import numpy as np
+
+from firmware_sim import FirmwareStandIn
+from protocol_module import ACCEL_UNIT
+from kinematics_module import calculate_fk, steps_to_degrees, DEFAULT_GEOMETRY
+
+MAX_SPEED = 3400.0
+ARRIVE_EPS = 0.5
+SIM_STEP = 0.001
+TRACE_LENGTH = 5000
+
+
+class ArmSimulator(FirmwareStandIn):
+    def __init__(self, max_speed=MAX_SPEED, trace_length=TRACE_LENGTH, verbose=False, protocol='binary',
+                 geometry=DEFAULT_GEOMETRY):
+        super().__init__(protocol, geometry.center_steps())
+        self.geometry = geometry
+        self.max_speed = max_speed
+        self.verbose = verbose
+        self.pos = np.array(self.positions, dtype=float)
+        self.vel = np.zeros(2)
+        self.target = self.pos.copy()
+        self.move_start = None
+        self.last_tick = time.monotonic()
+        self.trace = collections.deque(maxlen=trace_length)
+        self.events = collections.deque(maxlen=trace_length)
+        self.moves = 0
+
+    def limits(self):
+        vmax = np.array([s if s > 0 else self.max_speed for s in self.speed_limits], dtype=float)
+        acc = np.array([a * ACCEL_UNIT if a > 0 else np.inf for a in self.accels], dtype=float)
+        return np.minimum(vmax, self.max_speed), acc
+
+    def move(self, step1, step2):
+        self.target = np.array([step1, step2], dtype=float)
+        self.move_start = time.monotonic()
+
+    def end_effector(self):
+        return calculate_fk(steps_to_degrees(self.pos[0], True, self.geometry),
+                            steps_to_degrees(self.pos[1], False, self.geometry))
+
+    def advance(self, dt):
+        vmax, acc = self.limits()
+        dist = self.target - self.pos
+        direction = np.sign(dist)
+        braking = np.where(np.isinf(acc), 0.0, self.vel**2 / (2 * np.where(np.isinf(acc), 1.0, acc)))
+        slowing = (self.vel * direction > 0) & (braking >= np.abs(dist))
+        dv = np.where(np.isinf(acc), np.inf, acc * dt)
+        vel = np.where(slowing, self.vel - direction * np.minimum(dv, np.abs(self.vel)),
+                       np.clip(self.vel + direction * np.minimum(dv, 2 * vmax), -vmax, vmax))
+        pos = self.pos + vel * dt
+        done = (np.sign(self.target - pos) != direction) | (np.abs(self.target - pos) < ARRIVE_EPS)
+        self.pos = np.where(done, self.target, pos)
+        self.vel = np.where(done, 0.0, vel)
+
+    def poll(self):
+        now = time.monotonic()
+        dt, self.last_tick = now - self.last_tick, now
+        if self.move_start is None:
+            return b''
+        while dt > 0:
+            self.advance(min(dt, SIM_STEP))
+            dt -= SIM_STEP
+        self.positions = [int(round(p)) for p in self.pos]
+        self.speeds = [int(round(v)) for v in self.vel]
+        x, y = self.end_effector()
+        self.trace.append((now, x, y))
+        if not self.vel.any() and np.array_equal(self.pos, self.target):
+            duration = now - self.move_start
+            self.events.append((now, tuple(self.positions), duration))
+            self.moves += 1
+            self.move_start = None
+            if self.verbose:
+                where = f"{x:.1f}x{y:.1f} mm" if x is not None else "unreachable pose"
+                print(f"Move complete: M1:{self.positions[0]},M2:{self.positions[1]} "
+                      f"-> {where} in {duration * 1000:.0f} ms")
+        return b''
+
+
+if __name__ == "__main__":
+    sim = ArmSimulator(verbose=True).start()
+    print(f"Arm simulator listening on {sim.port}")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    sim.close()
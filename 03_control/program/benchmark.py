@@ -0,0 +1,87 @@
+import argparse
+import time
+import numpy as np
+
+from channel_module import SHAPE_NAMES
+from capture_module import open_source
+from visual_module import VisionPipeline, make_pipeline
+
+
+def percentiles(values):
+    if not values:
+        return 0.0, 0.0, 0.0
+    ms = np.asarray(values) * 1000.0
+    return ms.mean(), np.percentile(ms, 50), np.percentile(ms, 99)
+
+
+def run_benchmark(source, frames=None, warmup=10, fps=0, loop=False):
+    src = open_source(source, fps=fps, loop=loop)
+    pipeline = make_pipeline()
+
+    stages = ('read',) + VisionPipeline.STAGES
+    samples = {stage: [] for stage in stages}
+    latency = []
+    detected = np.zeros(len(SHAPE_NAMES), dtype=int)
+    picked = np.zeros(len(SHAPE_NAMES), dtype=int)
+
+    count = 0
+    start = None
+    while frames is None or count < frames + warmup:
+        t0 = time.perf_counter()
+        ret, frame = src.read()
+        if not ret: break
+        t1 = time.perf_counter()
+        capture_time = getattr(src, 'timestamp', None) or time.monotonic()
+        _, detections, picks, _ = pipeline.process(frame, count, capture_time)
+        done = time.monotonic()
+
+        count += 1
+        if count <= warmup:
+            continue
+        if start is None:
+            start = t0
+
+        samples['read'].append(t1 - t0)
+        for stage in VisionPipeline.STAGES:
+            samples[stage].append(pipeline.stage_times[stage])
+        latency.append(done - capture_time)
+        detected += np.bincount(detections['shape'], minlength=len(SHAPE_NAMES))
+        picked += np.bincount(picks['shape'], minlength=len(SHAPE_NAMES))
+    src.release()
+
+    measured = max(0, count - warmup)
+    elapsed = time.perf_counter() - start if start is not None else 0.0
+    return {
+        'frames': measured,
+        'elapsed': elapsed,
+        'fps': measured / elapsed if elapsed > 0 else 0.0,
+        'stages': {stage: percentiles(samples[stage]) for stage in stages},
+        'latency': percentiles(latency),
+        'detected': dict(zip(SHAPE_NAMES, detected.tolist())),
+        'picked': dict(zip(SHAPE_NAMES, picked.tolist())),
+    }
+
+
+def print_report(result):
+    print(f"Frames: {result['frames']}  Time: {result['elapsed']:.2f} s  FPS: {result['fps']:.1f}")
+    print(f"{'Stage':<10}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for stage, (mean, p50, p99) in result['stages'].items():
+        print(f"{stage:<10}{mean:>10.2f}{p50:>10.2f}{p99:>10.2f}")
+    mean, p50, p99 = result['latency']
+    print(f"Latency (capture -> picks): p50 {p50:.2f} ms  p99 {p99:.2f} ms")
+    print(f"{'Class':<10}{'detections':>12}{'picks':>8}")
+    for name in SHAPE_NAMES:
+        print(f"{name:<10}{result['detected'][name]:>12}{result['picked'][name]:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless vision pipeline benchmark")
+    parser.add_argument("source", help="camera index, video file, image directory or .npy frame dump")
+    parser.add_argument("--frames", type=int, default=None, help="number of frames to measure")
+    parser.add_argument("--warmup", type=int, default=10, help="frames processed before measuring")
+    parser.add_argument("--fps", type=float, default=0,
+                        help="pace the source like a live camera (default: as fast as possible)")
+    parser.add_argument("--loop", action="store_true", help="restart the recording when it ends")
+    args = parser.parse_args()
+
+    print_report(run_benchmark(args.source, args.frames, args.warmup, args.fps, args.loop))
@@ -0,0 +1,41 @@
+import cv2
+import numpy as np
+
+
+class BlobExtractor:
+    def __init__(self, min_area=500, region=None):
+        self.min_area = min_area
+        self.region = region
+        self.rejected = 0
+
+    def set_region(self, region):
+        self.region = region
+
+    def stats(self, mask):
+        n, labels, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        stats, centroids = stats[1:], centroids[1:]
+        keep = stats[:, cv2.CC_STAT_AREA] >= self.min_area
+
+        if self.region is not None:
+            h, w = self.region.shape[:2]
+            cx = centroids[:, 0].astype(int)
+            cy = centroids[:, 1].astype(int)
+            inside = (cx < w) & (cy < h)
+            keep &= inside & self.region[np.minimum(cy, h - 1), np.minimum(cx, w - 1)]
+
+        labels_kept = np.flatnonzero(keep) + 1
+        self.rejected = int(len(keep) - len(labels_kept))
+        return labels, labels_kept, stats[keep], centroids[keep]
+
+    def extract(self, mask, classes=None):
+        labels, labels_kept, stats, centroids = self.stats(mask)
+        contours = []
+        blob_classes = np.zeros(len(labels_kept), dtype=np.uint8)
+        for i, (label, (x, y, w, h, _)) in enumerate(zip(labels_kept, stats)):
+            blob = labels[y:y + h, x:x + w] == label
+            cnts, _ = cv2.findContours(blob.view(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
+                                       offset=(int(x), int(y)))
+            contours.append(max(cnts, key=len))
+            if classes is not None:
+                blob_classes[i] = np.bincount(classes[y:y + h, x:x + w][blob]).argmax()
+        return contours, stats, centroids, blob_classes
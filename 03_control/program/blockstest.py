@@ -1,14 +1,62 @@
+import os
+import argparse
 import pygame
 import random
+import time
+import itertools
+import numpy as np
+
+from worker_module import mark_ready
+from metrics_module import worker_metrics
+from channel_module import make_detections, SHAPE_CODES, COLOR_CODES
+
+SHAPE_IDS = itertools.count(1)
+TYPES = ('triangle', 'square', 'circle')
+BRIGHTNESS = tuple(range(80, 256, 16))
+THICKNESSES = (0, 3)
+SPRITE_KEYS = [(kind, bright, thickness) for kind in TYPES for bright in BRIGHTNESS for thickness in THICKNESSES]
+SPRITE_KINDS = [TYPES.index(key[0]) for key in SPRITE_KEYS]
+KIND_CODES = np.array([SHAPE_CODES[kind.capitalize()] for kind in TYPES])
+AREA_FACTORS = np.array([0.5, 1.0, np.pi / 4])
+CENTROID_OFFSETS = np.array([1 / 6, 0.0, 0.0])
+SPRITES = {}
+
+SIM_SIZE = (1280, 450)
+SHAPE_SIZE = 100
+LANE_GAP = 20
+STRESS_RATE = 1200
+REPORT_INTERVAL = 5.0
+
+
+def shape_sprite(kind, color, thickness, size=SHAPE_SIZE):
+    key = (kind, color, thickness, size)
+    sprite = SPRITES.get(key)
+    if sprite is not None:
+        return sprite
+    half = size // 2
+    sprite = pygame.Surface((size + 1, size + 1))
+    if pygame.display.get_surface() is not None:
+        sprite = sprite.convert()
+    sprite.fill((0, 0, 0))
+    if kind == 'circle':
+        pygame.draw.circle(sprite, color, (half, half), half, thickness)
+    elif kind == 'square':
+        pygame.draw.rect(sprite, color, (0, 0, size, size), thickness)
+    elif kind == 'triangle':
+        pygame.draw.polygon(sprite, color, [(half, 0), (0, size), (size, size)], thickness)
+    sprite.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+    SPRITES[key] = sprite
+    return sprite
 
 class Shape:
     def __init__(self, x, y):
-        self.type = random.choice(['triangle', 'square', 'circle'])
-        self.size = 100  
+        self.id = next(SHAPE_IDS)
+        self.type = random.choice(TYPES)
+        self.size = SHAPE_SIZE
         half = self.size // 2 
-        bright = random.randint(80, 255)
+        bright = random.choice(BRIGHTNESS)
         self.color = (0, bright, 0)
-        self.thickness = random.choice([0, 3])
+        self.thickness = random.choice(THICKNESSES)
         self.x = x
         self.y = y
         self.rect = pygame.Rect(x - half, y - half, self.size, self.size)
@@ -20,23 +68,103 @@ class Shape:
 
     def draw(self, surf):
         half = self.size // 2
-        if self.type == 'circle':
-            pygame.draw.circle(surf, self.color, (int(self.x), int(self.y)), half, self.thickness)
-        elif self.type == 'square':
-            pygame.draw.rect(surf, self.color, (self.x - half, self.y - half, self.size, self.size), self.thickness)
-        elif self.type == 'triangle':
-            pts = [
-                (self.x, self.y - half),
-                (self.x - half, self.y + half),
-                (self.x + half, self.y + half)
-            ]
-            pygame.draw.polygon(surf, self.color, pts, self.thickness)
-
-def run_display(conveyor_running, conveyor_speed, app_mode):
+        surf.blit(shape_sprite(self.type, self.color, self.thickness, self.size),
+                  (int(self.x) - half, int(self.y) - half))
+
+class ShapeStore:
+    def __init__(self, capacity, size=SHAPE_SIZE):
+        self.size = size
+        self.count = 0
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.kinds = np.zeros(capacity, dtype=np.intp)
+        self.sprites = np.zeros(capacity, dtype=np.intp)
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, x, y, sprite):
+        if self.count == len(self.ids):
+            return False
+        i = self.count
+        self.ids[i] = next(SHAPE_IDS)
+        self.kinds[i] = SPRITE_KINDS[sprite]
+        self.sprites[i] = sprite
+        self.x[i] = x
+        self.y[i] = y
+        self.count += 1
+        return True
+
+    def advance(self, dx, limit):
+        n = self.count
+        self.x[:n] += dx
+        keep = self.x[:n] <= limit
+        kept = int(np.count_nonzero(keep))
+        if kept < n:
+            for column in (self.ids, self.kinds, self.sprites, self.x, self.y):
+                column[:kept] = column[:n][keep]
+            self.count = kept
+        return n - kept
+
+    def view(self):
+        n = self.count
+        return self.ids[:n], self.kinds[:n], self.x[:n], self.y[:n]
+
+    def draw(self, surf, sprites):
+        n = self.count
+        half = self.size // 2
+        xs = (self.x[:n] - half).astype(int).tolist()
+        ys = (self.y[:n] - half).astype(int).tolist()
+        surf.blits([(sprites[k], (x, y)) for k, x, y in zip(self.sprites[:n].tolist(), xs, ys)], False)
+
+def shape_arrays(shapes):
+    ids = np.array([s.id for s in shapes], dtype=np.int64)
+    kinds = np.array([TYPES.index(s.type) for s in shapes], dtype=np.intp)
+    xs = np.array([s.x for s in shapes], dtype=float)
+    ys = np.array([s.y for s in shapes], dtype=float)
+    return ids, kinds, xs, ys
+
+def publish_frame(frame_buffer, screen, ids, kinds, xs, ys, size, frame_id):
+    if not frame_buffer.wanted():
+        return
+    width, height = screen.get_size()
+    scale = min(frame_buffer.max_w / width, frame_buffer.max_h / height, 1.0)
+    surface = screen
+    if scale < 1.0:
+        surface = pygame.transform.scale(screen, (int(width * scale), int(height * scale)))
+    w, h = surface.get_size()
+    frame = np.frombuffer(pygame.image.tobytes(surface, 'RGB'), dtype=np.uint8).reshape(h, w, 3)[:, :, ::-1]
+
+    cx = xs * scale
+    cy = (ys + CENTROID_OFFSETS[kinds] * size) * scale
+    inside = (cx >= 0) & (cx < frame.shape[1])
+    side = size * scale
+    truth = make_detections(int(np.count_nonzero(inside)))
+    truth['track_id'] = ids[inside]
+    truth['shape'] = KIND_CODES[kinds[inside]]
+    truth['color'] = COLOR_CODES['Green']
+    truth['cx'] = cx[inside]
+    truth['cy'] = cy[inside]
+    truth['area'] = AREA_FACTORS[kinds[inside]] * side * side
+    boxes = np.zeros((len(truth), 4), dtype=np.int32)
+    boxes[:, 0] = xs[inside] * scale - side / 2
+    boxes[:, 1] = ys[inside] * scale - side / 2
+    boxes[:, 2:] = side
+    timestamp = time.monotonic()
+    truth['frame_id'] = frame_id
+    truth['timestamp'] = timestamp
+    frame_buffer.publish(frame, truth, boxes, frame_id, timestamp)
+
+def run_display(conveyor_running, conveyor_speed, app_mode, ready=None, metrics=None, frame_buffer=None,
+                size=None):
     pygame.init()
-    monitor_info = pygame.display.Info()
-    WIDTH = int(monitor_info.current_w * 0.8)
-    HEIGHT = int(monitor_info.current_h * 0.5)
+    if size is None:
+        monitor_info = pygame.display.Info()
+        WIDTH = int(monitor_info.current_w * 0.8)
+        HEIGHT = int(monitor_info.current_h * 0.5)
+    else:
+        WIDTH, HEIGHT = size
     screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
     pygame.display.set_caption("Robot System Simulator")
     clock = pygame.time.Clock()
@@ -45,6 +173,9 @@ def run_display(conveyor_running, conveyor_speed, app_mode):
     manual_shape = Shape(WIDTH // 4, HEIGHT // 2)
     target_rect = pygame.Rect(WIDTH - 200, HEIGHT // 4, 150, 150)
     dragging = False
+    font = pygame.font.SysFont("Arial", 18)
+    meter = worker_metrics(metrics, 'display')
+    mark_ready(ready)
 
     running = True
     while running:
@@ -80,15 +211,14 @@ def run_display(conveyor_running, conveyor_speed, app_mode):
             if conveyor_running.is_set():
                 if len(conveyor_shapes) == 0 or conveyor_shapes[-1].x > (WIDTH // 3):
                     conveyor_shapes.append(Shape(-50, HEIGHT // 2))
-                for s in conveyor_shapes[:]:
+                for s in conveyor_shapes:
                     s.update_pos(s.x + conveyor_speed.value, s.y)
                     s.draw(screen)
-                    if s.x > WIDTH + 100: conveyor_shapes.remove(s)
+                conveyor_shapes = [s for s in conveyor_shapes if s.x <= WIDTH + 100]
             else:
                 for s in conveyor_shapes: s.draw(screen)
         else:
             pygame.draw.rect(screen, (50, 50, 50), target_rect, 2)
-            font = pygame.font.SysFont("Arial", 18)
             txt = font.render("DROP HERE", True, (100, 100, 100))
             text_x = target_rect.x + (target_rect.width - txt.get_width()) // 2
             text_y = target_rect.y + (target_rect.height - txt.get_height()) // 2
@@ -96,5 +226,113 @@ def run_display(conveyor_running, conveyor_speed, app_mode):
             manual_shape.draw(screen)
 
         pygame.display.flip()
+        if frame_buffer is not None:
+            shapes = conveyor_shapes if current_mode == 0 else [manual_shape]
+            publish_frame(frame_buffer, screen, *shape_arrays(shapes), SHAPE_SIZE, int(meter.get('frames')))
+        meter.add('frames')
+        meter.set('shapes', len(conveyor_shapes))
+        meter.tick()
         clock.tick(60)
     pygame.quit()
+
+
+def run_stress(spawn_rate=STRESS_RATE, lanes=2, count=0, speed=5, size=SIM_SIZE, headless=True, fps=0,
+               duration=None, frame_buffer=None, ready=None, metrics=None, shape_size=SHAPE_SIZE, band=None):
+    if headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    pygame.init()
+    WIDTH, HEIGHT = size
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Robot System Simulator (stress)")
+    clock = pygame.time.Clock()
+
+    sprites = [shape_sprite(kind, (0, bright, 0), thickness, shape_size) for kind, bright, thickness in SPRITE_KEYS]
+    spacing = shape_size + LANE_GAP
+    top, bottom = band if band is not None else (0, HEIGHT)
+    fit = max(1, int((bottom - top - shape_size) // spacing) + 1)
+    if lanes > fit:
+        print(f"Simulator: only {fit} of {lanes} lanes fit between y {top} and {bottom}")
+        lanes = fit
+    lane_y = (top + bottom) / 2 + (np.arange(lanes) - (lanes - 1) / 2) * spacing
+    store = ShapeStore(lanes * ((WIDTH + 2 * shape_size) // spacing + 2), shape_size)
+    lane_room = np.full(lanes, np.inf)
+    rng = np.random.default_rng()
+    meter = worker_metrics(metrics, 'display')
+    mark_ready(ready)
+
+    pending = 0.0
+    spawned = blocked = frames = 0
+    start = last = time.monotonic()
+    next_report = start + REPORT_INTERVAL
+    running = True
+    while running:
+        now = time.monotonic()
+        dt = now - last
+        dx = speed * 60.0 * dt
+        last = now
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+        if duration is not None and now - start >= duration:
+            break
+
+        store.advance(dx, WIDTH + shape_size)
+        lane_room += dx
+        if count and spawned >= count:
+            if len(store) == 0:
+                break
+        else:
+            pending += spawn_rate / 60.0 * dt
+            while pending >= 1.0:
+                lane = int(np.argmax(lane_room))
+                if lane_room[lane] < spacing or not store.spawn(-shape_size // 2, lane_y[lane],
+                                                                int(rng.integers(len(sprites)))):
+                    break
+                lane_room[lane] = 0.0
+                pending -= 1.0
+                spawned += 1
+            if pending > 1.0:
+                blocked += int(pending - 1.0)
+                pending -= int(pending - 1.0)
+
+        screen.fill((10, 10, 10))
+        store.draw(screen, sprites)
+        if not headless:
+            pygame.display.flip()
+        if frame_buffer is not None:
+            publish_frame(frame_buffer, screen, *store.view(), shape_size, frames)
+        frames += 1
+
+        meter.add('frames')
+        meter.set('shapes', len(store))
+        meter.set('spawned', spawned)
+        meter.tick(now)
+        if now >= next_report:
+            elapsed = now - start
+            print(f"Stress: {meter.get('fps'):.0f} fps, {len(store)} on belt, "
+                  f"{spawned * 60.0 / elapsed:.0f} shapes/min, {blocked} blocked")
+            next_report = now + REPORT_INTERVAL
+        if fps:
+            clock.tick(fps)
+
+    elapsed = time.monotonic() - start
+    pygame.quit()
+    print(f"Stress: {frames} frames in {elapsed:.1f} s ({frames / elapsed:.0f} fps), {spawned} shapes spawned "
+          f"({spawned * 60.0 / elapsed:.0f}/min), {blocked} blocked by full lanes")
+    return frames, spawned, blocked
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conveyor simulator stress mode")
+    parser.add_argument("--rate", type=float, default=STRESS_RATE, help="shapes spawned per minute")
+    parser.add_argument("--lanes", type=int, default=2, help="number of parallel lanes on the belt")
+    parser.add_argument("--count", type=int, default=0, help="stop after this many shapes (0 = no limit)")
+    parser.add_argument("--speed", type=int, default=5, help="belt speed in pixels per 1/60 s")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--fps", type=int, default=0, help="frame rate cap (0 = uncapped)")
+    parser.add_argument("--size", type=int, nargs=2, default=SIM_SIZE, metavar=("W", "H"))
+    parser.add_argument("--window", action="store_true", help="show the window instead of running headless")
+    args = parser.parse_args()
+
+    run_stress(args.rate, args.lanes, args.count, args.speed, tuple(args.size), not args.window, args.fps,
+               args.duration)
@@ -0,0 +1,109 @@
+import time
+import multiprocessing
+
+from channel_module import DetectionRing, DETECTION_RING_SIZE, make_detections
+from mailbox_module import TargetMailbox, POLICIES as MAILBOX_POLICIES
+
+POLICIES = ('all', 'sampled') + MAILBOX_POLICIES
+
+
+class Subscription:
+    def __init__(self, ring, name, policy='all', capacity=256, max_age=2.0, interval=0.2, cursor=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown subscription policy: {policy}")
+        self.ring = ring
+        self.name = name
+        self.policy = policy
+        self.capacity = capacity
+        self.max_age = max_age
+        self.interval = interval
+        self.cursor = ring.head if cursor is None else cursor
+        self.reader = None
+        self.mailbox = None
+        self.next_sample = 0.0
+        self.received = 0
+        self.delivered = 0
+        self.skipped = 0
+
+    def __getstate__(self):
+        return {'ring': self.ring, 'name': self.name, 'policy': self.policy, 'capacity': self.capacity,
+                'max_age': self.max_age, 'interval': self.interval, 'cursor': self.cursor}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _open(self):
+        if self.reader is None:
+            self.reader = self.ring.reader()
+            self.reader.cursor = self.cursor
+            if self.policy in MAILBOX_POLICIES:
+                self.mailbox = TargetMailbox(self.capacity, self.policy, self.max_age)
+        return self.reader
+
+    @property
+    def dropped(self):
+        dropped = self.skipped
+        if self.reader is not None:
+            dropped += self.reader.dropped
+        if self.mailbox is not None:
+            dropped += self.mailbox.dropped + self.mailbox.stale + self.mailbox.coalesced
+        return dropped
+
+    def pending(self):
+        return self._open().pending()
+
+    def wait(self, timeout=None):
+        return self._open().wait(timeout)
+
+    def read(self, now=None):
+        records = self._open().read()
+        self.cursor = self.reader.cursor
+        self.received += len(records)
+        now = time.monotonic() if now is None else now
+
+        if self.policy == 'sampled':
+            if now < self.next_sample:
+                self.skipped += len(records)
+                return make_detections(0)
+            self.next_sample = now + self.interval
+            if len(records) > self.capacity:
+                self.skipped += len(records) - self.capacity
+                records = records[-self.capacity:]
+        elif self.mailbox is not None:
+            self.mailbox.put(records, now)
+            records = self.mailbox.entries
+            self.mailbox.clear()
+
+        self.delivered += len(records)
+        return records
+
+    def counters(self):
+        return {'received': self.received, 'delivered': self.delivered, 'dropped': self.dropped}
+
+
+class DetectionBroker:
+    def __init__(self, capacity=DETECTION_RING_SIZE, ring=None, ctx=multiprocessing):
+        self.ring = DetectionRing(capacity, ctx=ctx) if ring is None else ring
+        self.subscriptions = {}
+
+    def __getstate__(self):
+        return {'ring': self.ring}
+
+    def __setstate__(self, state):
+        self.__init__(ring=state['ring'])
+
+    def publish(self, records):
+        self.ring.publish(records)
+
+    def subscribe(self, name, policy='all', **options):
+        if name in self.subscriptions:
+            raise ValueError(f"Subscriber already registered: {name}")
+        subscription = Subscription(self.ring, name, policy, **options)
+        self.subscriptions[name] = subscription
+        return subscription
+
+    def close(self):
+        self.ring.close()
+
+    def unlink(self):
+        self.ring.unlink()
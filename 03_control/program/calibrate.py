@@ -1,17 +1,27 @@
 import tkinter as tk
 import serial
 
+from protocol_module import encode_position, encode_ascii_position
+
+PORT = '/dev/ttyUSB0'
+PROTOCOL = 'ascii'
+seq = 0
+
 try:
-    arduino = serial.Serial('/dev/ttyUSB0', 115200)
+    arduino = serial.Serial(PORT, 115200)
     print("Connected!")
 except:
     print("Error! Check USB connection.")
 
 def send_pos(val):
+    global seq
     m1 = scale_m1.get()
     m2 = scale_m2.get()
-    cmd = f"M1:{m1},M2:{m2}\n"
-    arduino.write(cmd.encode())
+    if PROTOCOL == 'binary':
+        arduino.write(encode_position(seq, m1, m2))
+        seq = (seq + 1) & 0xFF
+    else:
+        arduino.write(encode_ascii_position(m1, m2))
 
 root = tk.Tk()
 root.title("Axis Calibration")
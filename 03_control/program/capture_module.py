@@ -0,0 +1,215 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+import time
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+DEFAULT_FPS = 30.0
+READ_TIMEOUT = 1.0
+
+
+def open_camera(index=0, width=1280, height=720):
+    cap = cv2.VideoCapture(index)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+class PacedSource(ABC):
+    def __init__(self, fps=None, loop=False):
+        fps = self.native_fps() if fps is None else fps
+        self.period = 1.0 / fps if fps else 0.0
+        self.loop = loop
+        self.next_time = None
+        self.timestamp = 0.0
+
+    def native_fps(self):
+        return DEFAULT_FPS
+
+    @abstractmethod
+    def grab(self):
+        """Return (ret, frame) for the next frame without pacing."""
+
+    def wait(self):
+        if not self.period:
+            return
+        now = time.monotonic()
+        if self.next_time is None:
+            self.next_time = now
+        if self.next_time > now:
+            time.sleep(self.next_time - now)
+        self.next_time += self.period
+
+    def read(self):
+        self.wait()
+        self.timestamp = time.monotonic()
+        return self.grab()
+
+    def release(self):
+        pass
+
+
+class IndexedSource(PacedSource):
+    def __init__(self, fps=None, loop=False):
+        super().__init__(fps, loop)
+        self.index = 0
+
+    @abstractmethod
+    def __len__(self):
+        """Number of frames in the recording."""
+
+    @abstractmethod
+    def frame_at(self, index):
+        """Load frame number index, or return None if it cannot be read."""
+
+    def grab(self):
+        if self.index >= len(self):
+            if not self.loop or len(self) == 0:
+                return False, None
+            self.index = 0
+        frame = self.frame_at(self.index)
+        self.index += 1
+        return frame is not None, frame
+
+
+class ImageDirSource(IndexedSource):
+    def __init__(self, path, fps=None, loop=False):
+        super().__init__(fps, loop)
+        self.files = sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+
+    def __len__(self):
+        return len(self.files)
+
+    def frame_at(self, index):
+        return cv2.imread(self.files[index], cv2.IMREAD_COLOR)
+
+
+class NumpySource(IndexedSource):
+    def __init__(self, path, fps=None, loop=False):
+        super().__init__(fps, loop)
+        self.frames = np.load(path, mmap_mode='r')
+
+    def __len__(self):
+        return len(self.frames)
+
+    def frame_at(self, index):
+        return np.ascontiguousarray(self.frames[index])
+
+
+class VideoFileSource(PacedSource):
+    def __init__(self, path, fps=None, loop=False):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(fps, loop)
+
+    def native_fps(self):
+        return self.cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+
+    def grab(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class SharedFrameSource:
+    def __init__(self, frame_buffer, timeout=None):
+        self.frame_buffer = frame_buffer
+        self.timeout = timeout
+        self.last_seq = None
+        self.frame_id = 0
+        self.timestamp = 0.0
+        self.truth = None
+        self.closed = False
+
+    def read(self):
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        while not self.closed:
+            remaining = READ_TIMEOUT if deadline is None else min(READ_TIMEOUT, deadline - time.monotonic())
+            if remaining <= 0:
+                break
+            if not self.frame_buffer.wait(self.last_seq, remaining):
+                continue
+            latest = self.frame_buffer.latest(self.last_seq)
+            if latest is None:
+                continue
+            self.last_seq, head, frame, self.truth, _ = latest
+            self.frame_id = int(head['frame_id'])
+            self.timestamp = float(head['timestamp'])
+            return True, frame
+        return False, None
+
+    def release(self):
+        self.closed = True
+
+
+def open_source(spec=0, fps=None, loop=False, width=1280, height=720):
+    if hasattr(spec, 'latest'):
+        return SharedFrameSource(spec)
+    if isinstance(spec, int) or str(spec).isdigit():
+        return open_camera(int(spec), width, height)
+    if str(spec).startswith('camera:'):
+        return open_camera(int(spec.split(':', 1)[1]), width, height)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec, fps, loop)
+    if spec.endswith('.npy'):
+        return NumpySource(spec, fps, loop)
+    return VideoFileSource(spec, fps, loop)
+
+
+class LatestFrameCapture:
+    def __init__(self, cap):
+        self.cap = cap
+        self.cond = threading.Condition()
+        self.frame = None
+        self.seq = 0
+        self.timestamp = 0.0
+        self.dropped = 0
+        self.consumed = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            timestamp = getattr(self.cap, 'timestamp', None) or time.monotonic()
+            with self.cond:
+                if not ret:
+                    self.running = False
+                    self.cond.notify_all()
+                    break
+                if self.frame is not None:
+                    self.dropped += 1
+                self.frame = frame
+                self.seq += 1
+                self.timestamp = timestamp
+                self.cond.notify_all()
+
+    def read(self, timeout=1.0):
+        with self.cond:
+            self.cond.wait_for(lambda: self.seq > self.consumed or not self.running, timeout)
+            if self.seq <= self.consumed:
+                return False, None, self.seq, self.timestamp
+            self.consumed = self.seq
+            frame, self.frame = self.frame, None
+            return True, frame, self.seq, self.timestamp
+
+    def release(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+        self.cap.release()
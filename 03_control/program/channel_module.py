@@ -0,0 +1,173 @@
+import time
+import numpy as np
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+
+SHAPE_NAMES = ['Unknown', 'Circle', 'Square', 'Triangle', 'Overlap']
+SHAPE_CODES = {name: code for code, name in enumerate(SHAPE_NAMES)}
+
+COLOR_NAMES = ['None', 'Green', 'Red', 'Blue', 'Yellow']
+COLOR_CODES = {name: code for code, name in enumerate(COLOR_NAMES)}
+
+DETECTION_DTYPE = np.dtype([
+    ('seq', np.uint64),
+    ('frame_id', np.uint64),
+    ('timestamp', np.float64),
+    ('shape', np.uint8),
+    ('color', np.uint8),
+    ('cx', np.float32),
+    ('cy', np.float32),
+    ('area', np.float32),
+    ('confidence', np.float32),
+    ('track_id', np.uint32),
+    ('vx', np.float32),
+    ('vy', np.float32),
+    ('t_detect', np.float64),
+    ('t_publish', np.float64),
+    ('t_receive', np.float64),
+], align=True)
+
+DETECTION_RING_SIZE = 1024
+
+INVALID_SEQ = np.iinfo(np.uint64).max
+HEADER_WORDS = 8
+
+
+_created_segments = set()
+
+
+def create_shared_memory(size, name=None):
+    shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+    _created_segments.add(shm.name)
+    return shm
+
+
+def attach_shared_memory(name):
+    shm = shared_memory.SharedMemory(name=name)
+    # Child processes share the creator's resource tracker. A standalone
+    # process has its own, which would unlink the segment when it exits.
+    inherited = getattr(multiprocessing.current_process(), '_inheriting', False)
+    if not inherited and multiprocessing.parent_process() is None and name not in _created_segments:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def make_detections(count):
+    return np.zeros(count, dtype=DETECTION_DTYPE)
+
+
+def shape_name(code):
+    if code < len(SHAPE_NAMES):
+        return SHAPE_NAMES[code]
+    return SHAPE_NAMES[0]
+
+
+def color_name(code):
+    if code < len(COLOR_NAMES):
+        return COLOR_NAMES[code]
+    return COLOR_NAMES[0]
+
+
+def format_detection(det):
+    return f"[{color_name(int(det['color']))} {shape_name(int(det['shape']))}] X:{int(det['cx'])} Y:{int(det['cy'])}"
+
+
+class DetectionRing:
+    def __init__(self, capacity=DETECTION_RING_SIZE, name=None, cond=None, ctx=multiprocessing):
+        self.capacity = capacity
+        size = HEADER_WORDS * 8 + capacity * DETECTION_DTYPE.itemsize
+        self.owner = name is None
+        if not self.owner and cond is None:
+            raise ValueError("Attaching a detection ring needs the owner's Condition; pass the ring to the worker")
+        if self.owner:
+            self.shm = create_shared_memory(size)
+        else:
+            self.shm = attach_shared_memory(name)
+        self.name = self.shm.name
+        self.cond = ctx.Condition() if self.owner else cond
+        self._map()
+        if self.owner:
+            self.header[:] = 0
+            self.slots['seq'] = INVALID_SEQ
+
+    def _map(self):
+        self.header = np.ndarray((HEADER_WORDS,), dtype=np.uint64, buffer=self.shm.buf)
+        self.slots = np.ndarray((self.capacity,), dtype=DETECTION_DTYPE,
+                                buffer=self.shm.buf, offset=HEADER_WORDS * 8)
+
+    def __getstate__(self):
+        return {'capacity': self.capacity, 'name': self.name, 'cond': self.cond}
+
+    def __setstate__(self, state):
+        self.__init__(state['capacity'], state['name'], state['cond'])
+
+    @property
+    def head(self):
+        return int(self.header[0])
+
+    def publish(self, records):
+        n = len(records)
+        if n == 0:
+            return
+        if n > self.capacity:
+            records = records[-self.capacity:]
+            n = self.capacity
+        start = int(self.header[0])
+        seqs = np.arange(start, start + n, dtype=np.uint64)
+        idx = seqs % self.capacity
+
+        data = np.array(records, dtype=DETECTION_DTYPE, copy=True)
+        data['seq'] = INVALID_SEQ
+        data['t_publish'] = time.monotonic()
+        self.slots['seq'][idx] = INVALID_SEQ
+        self.slots[idx] = data
+        self.slots['seq'][idx] = seqs
+        with self.cond:
+            self.header[0] = start + n
+            self.cond.notify_all()
+
+    def reader(self):
+        return RingReader(self)
+
+    def close(self):
+        self.header = None
+        self.slots = None
+        self.shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
+
+
+class RingReader:
+    def __init__(self, ring, cursor=None):
+        self.ring = ring
+        self.cursor = ring.head if cursor is None else cursor
+        self.dropped = 0
+
+    def pending(self):
+        return self.ring.head - self.cursor
+
+    def wait(self, timeout=None):
+        cond = self.ring.cond
+        with cond:
+            return cond.wait_for(lambda: self.pending() > 0, timeout)
+
+    def read(self, max_items=None):
+        head = self.ring.head
+        start = self.cursor
+        if head - start > self.ring.capacity:
+            self.dropped += head - self.ring.capacity - start
+            start = head - self.ring.capacity
+        if max_items is not None and head - start > max_items:
+            head = start + max_items
+        if head <= start:
+            return make_detections(0)
+
+        seqs = np.arange(start, head, dtype=np.uint64)
+        idx = seqs % self.ring.capacity
+        records = self.ring.slots[idx]
+        valid = (records['seq'] == seqs) & (self.ring.slots['seq'][idx] == seqs)
+        self.dropped += int(len(valid) - np.count_nonzero(valid))
+        self.cursor = head
+        return records[valid]
@@ -0,0 +1,186 @@
+import os
+import argparse
+import threading
+import time
+import numpy as np
+
+from worker_module import start_context, run_worker
+from preview_module import FrameBuffer
+from capture_module import SharedFrameSource
+from visual_module import make_pipeline, SCREEN_W, SCREEN_H
+from broker_module import DetectionBroker
+from robot_module import run_robot, SIM_PORT, SERIAL_PROTOCOL
+from channel_module import SHAPE_NAMES
+from latency_module import LatencyHistograms
+
+SIM_SIZE = (1280, 450)
+FRAME_TIMEOUT = 10.0
+MATCH_DISTANCE = 40.0
+WARMUP_TIME = 2.0
+STRESS_FPS = 60
+
+
+def roi_band(height, width):
+    roi_h = min(height, int(width * (SCREEN_H / SCREEN_W)))
+    top = max(0, (height - roi_h) // 2)
+    return top, top + roi_h
+
+
+def match_truth(detections, truth, offset, max_distance=MATCH_DISTANCE):
+    if len(detections) == 0 or len(truth) == 0:
+        return []
+    dx = detections['cx'][:, None] - truth['cx'][None, :]
+    dy = detections['cy'][:, None] - (truth['cy'][None, :] - offset)
+    distance = np.hypot(dx, dy)
+    pairs = []
+    used_det, used_truth = set(), set()
+    for i, j in zip(*np.unravel_index(np.argsort(distance, axis=None), distance.shape)):
+        if distance[i, j] > max_distance:
+            break
+        if i in used_det or j in used_truth:
+            continue
+        used_det.add(i)
+        used_truth.add(j)
+        pairs.append((i, j, distance[i, j]))
+    return pairs
+
+
+class LoopStats:
+    def __init__(self):
+        self.frames = 0
+        self.skipped = 0
+        self.truth = 0
+        self.detections = 0
+        self.matched = 0
+        self.shape_correct = 0
+        self.errors = []
+        self.confusion = np.zeros((len(SHAPE_NAMES), len(SHAPE_NAMES)), dtype=np.int64)
+
+    def add(self, detections, truth, pairs, skipped):
+        self.frames += 1
+        self.skipped += skipped
+        self.truth += len(truth)
+        self.detections += len(detections)
+        self.matched += len(pairs)
+        for i, j, distance in pairs:
+            expected, found = int(truth[j]['shape']), int(detections[i]['shape'])
+            self.confusion[expected, found] += 1
+            self.shape_correct += expected == found
+            self.errors.append(distance)
+
+    def report(self, elapsed):
+        precision = self.matched / self.detections if self.detections else 0.0
+        recall = self.matched / self.truth if self.truth else 0.0
+        accuracy = self.shape_correct / self.matched if self.matched else 0.0
+        errors = np.array(self.errors) if self.errors else np.zeros(1)
+        lines = [
+            f"Frames: {self.frames} processed, {self.skipped} skipped, {self.frames / elapsed:.1f} fps",
+            f"Objects: truth={self.truth} detected={self.detections} matched={self.matched}",
+            f"Precision {precision:.3f}  recall {recall:.3f}  shape accuracy {accuracy:.3f}",
+            f"Position error: mean {errors.mean():.1f} px  p95 {np.percentile(errors, 95):.1f} px",
+        ]
+        for code, name in enumerate(SHAPE_NAMES):
+            row = self.confusion[code]
+            if row.sum():
+                found = " ".join(f"{SHAPE_NAMES[k]}={row[k]}" for k in np.flatnonzero(row))
+                lines.append(f"  {name:<9} -> {found}")
+        return "\n".join(lines)
+
+
+def run_closed_loop(duration=20.0, speed=5, port=SIM_PORT, protocol=SERIAL_PROTOCOL, robot=True, size=SIM_SIZE,
+                    stress_rate=None, lanes=2):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    ctx = start_context()
+    conveyor_running = ctx.Event()
+    conveyor_speed = ctx.Value('i', speed)
+    app_mode = ctx.Value('i', 0)
+    camera = FrameBuffer(ctx=ctx)
+    if stress_rate:
+        display = ctx.Process(target=run_worker, args=('blockstest:run_stress', stress_rate, lanes, 0, speed, size),
+                              kwargs={'frame_buffer': camera, 'fps': STRESS_FPS,
+                                      'band': roi_band(size[1], size[0])})
+    else:
+        display = ctx.Process(target=run_worker, args=('blockstest:run_display', conveyor_running, conveyor_speed,
+                                                       app_mode),
+                              kwargs={'frame_buffer': camera, 'size': size})
+    display.start()
+
+    broker = DetectionBroker()
+    latency = LatencyHistograms()
+    stop_event = threading.Event()
+    robot_thread = None
+    if robot:
+        robot_thread = threading.Thread(target=run_robot, args=(broker.subscribe('robot'), conveyor_running,
+                                                                conveyor_speed, stop_event, port, protocol),
+                                        kwargs={'latency': latency})
+        robot_thread.start()
+
+    source = SharedFrameSource(camera, timeout=FRAME_TIMEOUT)
+    pipeline = make_pipeline()
+    stats = LoopStats()
+    conveyor_running.set()
+    warmup_end = time.monotonic() + WARMUP_TIME
+    start = None
+    last_id = None
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        roi, detections, picks, _ = pipeline.process(frame, source.frame_id, source.timestamp)
+        detect_time = time.monotonic()
+        picks['t_detect'] = detect_time
+        broker.publish(picks)
+        if detect_time < warmup_end:
+            continue
+        if start is None:
+            start = detect_time
+            latency.reset()
+        latency.record('vision', detect_time - source.timestamp)
+        skipped = source.frame_id - last_id - 1 if last_id is not None else 0
+        last_id = source.frame_id
+        top, bottom = roi_band(frame.shape[0], frame.shape[1])
+        truth = source.truth[(source.truth['cy'] >= top) & (source.truth['cy'] < bottom)]
+        pairs = match_truth(detections, truth, top)
+        stats.add(detections, truth, pairs, max(0, skipped))
+        if detect_time - start >= duration:
+            break
+    elapsed = time.monotonic() - start if start is not None else 0.0
+
+    conveyor_running.clear()
+    source.release()
+    display.terminate()
+    display.join()
+    stop_event.set()
+    if robot_thread is not None:
+        robot_thread.join()
+
+    if stats.frames == 0:
+        print("No frames received from the simulator. Is pygame installed?")
+    else:
+        print(f"Closed loop at belt speed {speed} for {elapsed:.1f} s")
+        print(stats.report(elapsed))
+        print(latency.report())
+    broker.close()
+    broker.unlink()
+    camera.close()
+    camera.unlink()
+    latency.close()
+    latency.unlink()
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the conveyor simulator through the vision pipeline and "
+                                                 "score the detections against its ground truth")
+    parser.add_argument("--duration", type=float, default=20.0, help="measurement time in seconds")
+    parser.add_argument("--speed", type=int, default=5, help="belt speed in pixels per simulator frame")
+    parser.add_argument("--port", default=SIM_PORT, help="serial port, or 'sim' for the arm simulator")
+    parser.add_argument("--protocol", default=SERIAL_PROTOCOL, choices=('binary', 'ascii'))
+    parser.add_argument("--no-robot", action="store_true", help="stop at the vision stage")
+    parser.add_argument("--stress", type=float, default=None, metavar="RATE",
+                        help="use the simulator stress mode, spawning RATE shapes per minute")
+    parser.add_argument("--lanes", type=int, default=2, help="lanes on the belt in stress mode")
+    args = parser.parse_args()
+
+    run_closed_loop(args.duration, args.speed, args.port, args.protocol, not args.no_robot,
+                    stress_rate=args.stress, lanes=args.lanes)
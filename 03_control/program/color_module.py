@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+
+from channel_module import COLOR_CODES
+
+COLOR_BITS = 5
+
+DEFAULT_COLOR_RANGES = {
+    'Green': [((35, 40, 20), (90, 255, 255))],
+    'Red': [((0, 100, 60), (10, 255, 255)), ((170, 100, 60), (179, 255, 255))],
+    'Blue': [((100, 100, 40), (130, 255, 255))],
+    'Yellow': [((20, 100, 80), (34, 255, 255))],
+}
+
+
+def lut_cell_colors(bits=COLOR_BITS):
+    levels = 1 << bits
+    shift = 8 - bits
+    q = np.arange(levels, dtype=np.uint16)
+    centers = ((q << shift) | (1 << shift >> 1)).astype(np.uint8)
+    b, g, r = np.meshgrid(centers, centers, centers, indexing='ij')
+    return np.stack([b, g, r], axis=-1).reshape(-1, 3)
+
+
+def build_lut_from_hsv(color_ranges=None, bits=COLOR_BITS):
+    color_ranges = DEFAULT_COLOR_RANGES if color_ranges is None else color_ranges
+    cells = lut_cell_colors(bits)
+    hsv = cv2.cvtColor(cells.reshape(-1, 1, 3), cv2.COLOR_BGR2HSV).reshape(-1, 3)
+    lut = np.zeros(len(cells), dtype=np.uint8)
+    for name, ranges in color_ranges.items():
+        for lower, upper in ranges:
+            inside = np.all((hsv >= lower) & (hsv <= upper), axis=1)
+            lut[inside & (lut == 0)] = COLOR_CODES[name]
+    return lut
+
+
+def build_lut_from_samples(samples, bits=COLOR_BITS, spread=1):
+    levels = 1 << bits
+    shift = 8 - bits
+    steps = np.arange(-spread, spread + 1)
+    offsets = np.stack(np.meshgrid(steps, steps, steps, indexing='ij'), axis=-1).reshape(-1, 3)
+    lut = np.zeros(levels ** 3, dtype=np.uint8)
+    for name, pixels in samples.items():
+        q = np.unique(np.asarray(pixels, dtype=np.uint8).reshape(-1, 3) >> shift, axis=0).astype(int)
+        cells = np.clip(q[:, None, :] + offsets[None, :, :], 0, levels - 1).reshape(-1, 3)
+        idx = (cells[:, 0] << (2 * bits)) | (cells[:, 1] << bits) | cells[:, 2]
+        free = idx[lut[idx] == 0]
+        lut[free] = COLOR_CODES[name]
+    return lut
+
+
+class ColorSegmenter:
+    def __init__(self, lut=None, bits=COLOR_BITS, kernel_size=3):
+        self.bits = bits
+        self.lut = build_lut_from_hsv(bits=bits) if lut is None else lut
+        self.kernel = np.ones((kernel_size, kernel_size), np.uint8)
+        values = np.arange(256) >> (8 - bits)
+        self.channel_tables = [(values << (2 * bits)).astype(np.uint16),
+                               (values << bits).astype(np.uint16),
+                               values.astype(np.uint16)]
+
+    def index(self, roi):
+        b, g, r = cv2.split(roi)
+        tb, tg, tr = self.channel_tables
+        return cv2.add(cv2.add(cv2.LUT(b, tb), cv2.LUT(g, tg)), cv2.LUT(r, tr))
+
+    def segment(self, roi):
+        labels = np.take(self.lut, self.index(roi))
+        mask = cv2.morphologyEx(cv2.compare(labels, 0, cv2.CMP_GT), cv2.MORPH_OPEN, self.kernel)
+        return labels, mask
+
+    def save(self, path):
+        np.save(path, self.lut)
+
+    @classmethod
+    def load(cls, path, bits=COLOR_BITS):
+        return cls(np.load(path), bits)
@@ -0,0 +1,119 @@
+import os
+import sys
+import tty
+import time
+import select
+import threading
+
+from kinematics_module import center_steps
+from protocol_module import (FrameDecoder, encode_ack, encode_nak_unknown, encode_state, CMD_POSITION, CMD_SPEED,
+                             CMD_ACCEL, CMD_FEEDBACK, STATUS_BAD_CRC, STATUS_BAD_COMMAND)
+
+
+class FirmwareStandIn:
+    def __init__(self, protocol='binary', home=None):
+        if protocol not in ('binary', 'ascii'):
+            raise ValueError(f"Unknown serial protocol: {protocol}")
+        self.binary = protocol == 'binary'
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.master)
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.decoder = FrameDecoder()
+        self.line = bytearray()
+        self.positions = list(home or center_steps())
+        self.speeds = [0, 0]
+        self.speed_limits = [0, 0]
+        self.accels = [0, 0]
+        self.loads = [0, 0]
+        self.commands = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="firmware", daemon=True)
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        os.close(self.master)
+        os.close(self.slave)
+
+    def move(self, step1, step2):
+        self.positions = [step1, step2]
+
+    def state(self):
+        return ((self.positions[0], self.speeds[0], self.loads[0]),
+                (self.positions[1], self.speeds[1], self.loads[1]))
+
+    def handle(self, frame):
+        self.commands += 1
+        if frame.cmd == CMD_POSITION:
+            self.move(*frame.values())
+        elif frame.cmd == CMD_SPEED:
+            self.speed_limits = list(frame.values())
+        elif frame.cmd == CMD_ACCEL:
+            self.accels = list(frame.values())
+        elif frame.cmd == CMD_FEEDBACK:
+            return encode_state(frame.seq, *self.state())
+        else:
+            return encode_ack(frame.seq, STATUS_BAD_COMMAND, nak=True)
+        return encode_ack(frame.seq)
+
+    def handle_line(self, line):
+        try:
+            m1, m2 = line.decode('ascii').strip().split(',')
+            step1, step2 = int(m1.split(':')[1]), int(m2.split(':')[1])
+        except (UnicodeDecodeError, ValueError, IndexError):
+            return
+        self.commands += 1
+        self.move(step1, step2)
+
+    def poll(self):
+        return b''
+
+    def _receive(self, data):
+        if not self.binary:
+            self.line += data
+            *lines, rest = self.line.split(b'\n')
+            self.line = bytearray(rest)
+            for line in lines:
+                self.handle_line(bytes(line))
+            return []
+        replies = []
+        errors = self.decoder.crc_errors
+        for frame in self.decoder.feed(data):
+            replies.append(self.handle(frame))
+        if self.decoder.crc_errors != errors:
+            replies.append(encode_nak_unknown(0, STATUS_BAD_CRC))
+        return replies
+
+    def _run(self):
+        while self.running:
+            readable, _, _ = select.select([self.master], [], [], 0.01)
+            replies = []
+            if readable:
+                try:
+                    data = os.read(self.master, 4096)
+                except OSError:
+                    break
+                replies += self._receive(data)
+            replies.append(self.poll())
+            out = b''.join(replies)
+            if out:
+                os.write(self.master, out)
+
+
+if __name__ == "__main__":
+    firmware = FirmwareStandIn(sys.argv[1] if len(sys.argv) > 1 else 'binary').start()
+    print(f"Firmware stand-in ({'binary' if firmware.binary else 'ascii'}) listening on {firmware.port}")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    firmware.close()
@@ -0,0 +1,203 @@
+import os
+import math
+import numpy as np
+from dataclasses import dataclass, fields
+
+BASE_D = 100.0
+L1 = 140.0
+L2 = 190.0
+
+M1_X = -BASE_D / 2.0
+M1_Y = 0.0
+M2_X = BASE_D / 2.0
+M2_Y = 0.0
+
+M1_CENTER = 2524
+M2_CENTER = 2048
+STEPS_PER_REV = 4096
+
+DETECTION_W = 1480
+DETECTION_H = 320
+
+TABLE_WIDTH_MM = 268.2
+TABLE_HEIGHT_MM = 58.0
+OFFSET_Y = 100.0
+SCALE_X_FACTOR = 1.0
+SCALE_Y_FACTOR = 1.0
+CAMERA_SHIFT_X = 0.0
+
+UNREACHABLE = -1
+STEP_LOOKUP_FILE = 'step_lookup.npz'
+
+
+@dataclass
+class Geometry:
+    table_width_mm: float = TABLE_WIDTH_MM
+    table_height_mm: float = TABLE_HEIGHT_MM
+    offset_y: float = OFFSET_Y
+    scale_x_factor: float = SCALE_X_FACTOR
+    scale_y_factor: float = SCALE_Y_FACTOR
+    camera_shift_x: float = CAMERA_SHIFT_X
+    m1_center: int = M1_CENTER
+    m2_center: int = M2_CENTER
+
+    def __post_init__(self):
+        for field in fields(self):
+            setattr(self, field.name, field.type(getattr(self, field.name)))
+
+    def center_steps(self):
+        return self.m1_center, self.m2_center
+
+    def signature(self):
+        return np.array([BASE_D, L1, L2, M1_X, M1_Y, M2_X, M2_Y, self.m1_center, self.m2_center, STEPS_PER_REV,
+                         DETECTION_W, DETECTION_H, self.table_width_mm, self.table_height_mm, self.offset_y,
+                         self.scale_x_factor, self.scale_y_factor, self.camera_shift_x])
+
+
+DEFAULT_GEOMETRY = Geometry()
+
+
+def center_steps(geometry=DEFAULT_GEOMETRY):
+    return geometry.center_steps()
+
+
+def calculate_ik(target_x, target_y):
+    dx1 = target_x - M1_X
+    dy1 = target_y - M1_Y
+    d1 = math.hypot(dx1, dy1)
+
+    dx2 = target_x - M2_X
+    dy2 = target_y - M2_Y
+    d2 = math.hypot(dx2, dy2)
+
+    if d1 > (L1 + L2) or d2 > (L1 + L2):
+        return None, None
+    if d1 < abs(L1 - L2) or d2 < abs(L1 - L2):
+        return None, None
+
+    alpha1 = math.atan2(dy1, dx1)
+    beta1 = math.acos((d1**2 + L1**2 - L2**2) / (2 * L1 * d1))
+    angle_m1_rad = alpha1 + beta1
+
+    alpha2 = math.atan2(dy2, dx2)
+    beta2 = math.acos((d2**2 + L1**2 - L2**2) / (2 * L1 * d2))
+    angle_m2_rad = alpha2 - beta2
+
+    return math.degrees(angle_m1_rad), math.degrees(angle_m2_rad)
+
+
+def calculate_ik_array(target_x, target_y):
+    target_x = np.asarray(target_x, dtype=float)
+    target_y = np.asarray(target_y, dtype=float)
+
+    dx1, dy1 = target_x - M1_X, target_y - M1_Y
+    dx2, dy2 = target_x - M2_X, target_y - M2_Y
+    d1 = np.hypot(dx1, dy1)
+    d2 = np.hypot(dx2, dy2)
+
+    reachable = ((d1 <= L1 + L2) & (d2 <= L1 + L2)
+                 & (d1 >= abs(L1 - L2)) & (d2 >= abs(L1 - L2)))
+    d1 = np.where(reachable, d1, 1.0)
+    d2 = np.where(reachable, d2, 1.0)
+
+    cos1 = np.clip((d1**2 + L1**2 - L2**2) / (2 * L1 * d1), -1.0, 1.0)
+    cos2 = np.clip((d2**2 + L1**2 - L2**2) / (2 * L1 * d2), -1.0, 1.0)
+    angle_m1 = np.degrees(np.arctan2(dy1, dx1) + np.arccos(cos1))
+    angle_m2 = np.degrees(np.arctan2(dy2, dx2) - np.arccos(cos2))
+
+    angle_m1 = np.where(reachable, angle_m1, np.nan)
+    angle_m2 = np.where(reachable, angle_m2, np.nan)
+    return angle_m1, angle_m2
+
+
+def degrees_to_steps(degrees, is_left_motor, geometry=DEFAULT_GEOMETRY):
+    center = geometry.m1_center if is_left_motor else geometry.m2_center
+    steps = int(center + ((degrees - 90.0) / 360.0) * STEPS_PER_REV)
+    return max(0, min(STEPS_PER_REV - 1, steps))
+
+
+def degrees_to_steps_array(degrees, is_left_motor, geometry=DEFAULT_GEOMETRY):
+    center = geometry.m1_center if is_left_motor else geometry.m2_center
+    degrees = np.asarray(degrees, dtype=float)
+    steps = np.clip(np.trunc(center + ((degrees - 90.0) / 360.0) * STEPS_PER_REV), 0, STEPS_PER_REV - 1)
+    return np.where(np.isnan(degrees), UNREACHABLE, np.nan_to_num(steps)).astype(np.int16)
+
+
+def steps_to_degrees(steps, is_left_motor, geometry=DEFAULT_GEOMETRY):
+    center = geometry.m1_center if is_left_motor else geometry.m2_center
+    return 90.0 + (steps - center) / STEPS_PER_REV * 360.0
+
+
+def calculate_fk(angle_m1, angle_m2):
+    a1 = math.radians(angle_m1)
+    a2 = math.radians(angle_m2)
+    e1x, e1y = M1_X + L1 * math.cos(a1), M1_Y + L1 * math.sin(a1)
+    e2x, e2y = M2_X + L1 * math.cos(a2), M2_Y + L1 * math.sin(a2)
+
+    dx, dy = e2x - e1x, e2y - e1y
+    d = math.hypot(dx, dy)
+    if d == 0 or d > 2 * L2:
+        return None, None
+    h = math.sqrt(L2**2 - (d / 2.0)**2)
+    mx, my = e1x + dx / 2.0, e1y + dy / 2.0
+    x1, y1 = mx - h * dy / d, my + h * dx / d
+    x2, y2 = mx + h * dy / d, my - h * dx / d
+    return (x1, y1) if y1 >= y2 else (x2, y2)
+
+
+def pixel_to_table(pixel_x, pixel_y, geometry=DEFAULT_GEOMETRY):
+    g = geometry
+    corrected_pixel_y = DETECTION_H - np.asarray(pixel_y, dtype=float)
+    target_x = ((np.asarray(pixel_x, dtype=float) / DETECTION_W) * g.table_width_mm - (g.table_width_mm / 2.0)) \
+        * g.scale_x_factor + g.camera_shift_x
+    target_y = ((corrected_pixel_y / DETECTION_H) * g.table_height_mm) * g.scale_y_factor + g.offset_y
+    return target_x, target_y
+
+
+class StepLookup:
+    def __init__(self, m1_steps, m2_steps, geometry=DEFAULT_GEOMETRY):
+        self.m1 = m1_steps
+        self.m2 = m2_steps
+        self.geometry = geometry
+        self.reachable = m1_steps != UNREACHABLE
+
+    @classmethod
+    def build(cls, geometry=DEFAULT_GEOMETRY):
+        py, px = np.mgrid[0:DETECTION_H, 0:DETECTION_W]
+        angle_m1, angle_m2 = calculate_ik_array(*pixel_to_table(px, py, geometry))
+        return cls(degrees_to_steps_array(angle_m1, True, geometry), degrees_to_steps_array(angle_m2, False, geometry),
+                   geometry)
+
+    @classmethod
+    def load(cls, geometry=DEFAULT_GEOMETRY, path=STEP_LOOKUP_FILE):
+        try:
+            data = np.load(path)
+            if np.array_equal(data['signature'], geometry.signature()):
+                return cls(data['m1'], data['m2'], geometry)
+        except (OSError, ValueError, KeyError):
+            pass
+        lookup = cls.build(geometry)
+        lookup.save(path)
+        return lookup
+
+    def save(self, path=STEP_LOOKUP_FILE):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as file:
+                np.savez(file, m1=self.m1, m2=self.m2, signature=self.geometry.signature())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"WARNING: Could not save step lookup ({e}).")
+
+    def lookup_array(self, pixel_x, pixel_y):
+        px = np.clip(np.asarray(pixel_x).astype(int), 0, DETECTION_W - 1)
+        py = np.clip(np.asarray(pixel_y).astype(int), 0, DETECTION_H - 1)
+        return self.m1[py, px], self.m2[py, px]
+
+    def lookup(self, pixel_x, pixel_y):
+        if not (0 <= pixel_x < DETECTION_W and 0 <= pixel_y < DETECTION_H):
+            return None
+        step1 = int(self.m1[int(pixel_y), int(pixel_x)])
+        if step1 == UNREACHABLE:
+            return None
+        return step1, int(self.m2[int(pixel_y), int(pixel_x)])
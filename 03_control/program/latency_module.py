@@ -0,0 +1,96 @@
+import sys
+import numpy as np
+from multiprocessing import shared_memory
+
+from channel_module import create_shared_memory, attach_shared_memory
+
+LATENCY_NAME = 'gesturebot_latency'
+STAGES = ('vision', 'channel', 'mailbox', 'plan', 'serial', 'ack', 'end_to_end')
+BIN_EDGES = np.geomspace(1e-5, 100.0, 97)
+PERCENTILES = (50, 95, 99)
+COUNT, TOTAL_US, FIRST_BIN = 0, 1, 2
+
+
+class LatencyHistograms:
+    def __init__(self, name=None, create=False, stages=STAGES):
+        self.stages = stages
+        self.index = {stage: i for i, stage in enumerate(stages)}
+        self.shape = (len(stages), FIRST_BIN + len(BIN_EDGES) + 1)
+        size = int(np.prod(self.shape)) * 8
+        self.owner = create or name is None
+        if self.owner:
+            if name is not None:
+                try:
+                    stale = shared_memory.SharedMemory(name=name)
+                    stale.close()
+                    stale.unlink()
+                except FileNotFoundError:
+                    pass
+            self.shm = create_shared_memory(size, name)
+        else:
+            self.shm = attach_shared_memory(name)
+        self.name = self.shm.name
+        self.table = np.ndarray(self.shape, dtype=np.uint64, buffer=self.shm.buf)
+        if self.owner:
+            self.table[:] = 0
+
+    def __getstate__(self):
+        return {'name': self.name, 'stages': self.stages}
+
+    def __setstate__(self, state):
+        self.__init__(state['name'], stages=state['stages'])
+
+    def record(self, stage, seconds):
+        seconds = np.atleast_1d(np.asarray(seconds, dtype=float))
+        seconds = seconds[np.isfinite(seconds)]
+        if len(seconds) == 0:
+            return
+        row = self.table[self.index[stage]]
+        row[COUNT] += np.uint64(len(seconds))
+        row[TOTAL_US] += np.uint64(max(0.0, seconds.sum()) * 1e6)
+        bins = np.searchsorted(BIN_EDGES, seconds, side='right')
+        np.add.at(row, FIRST_BIN + bins, np.uint64(1))
+
+    def summary(self, stage):
+        row = self.table[self.index[stage]]
+        count = int(row[COUNT])
+        if count == 0:
+            return count, 0.0, [0.0] * len(PERCENTILES)
+        cumulative = np.cumsum(row[FIRST_BIN:])
+        values = []
+        for p in PERCENTILES:
+            b = int(np.searchsorted(cumulative, count * p / 100.0))
+            upper = BIN_EDGES[min(b, len(BIN_EDGES) - 1)]
+            lower = BIN_EDGES[b - 1] if 0 < b <= len(BIN_EDGES) else upper
+            values.append(float(np.sqrt(lower * upper)))
+        return count, row[TOTAL_US] / count / 1e6, values
+
+    def report(self):
+        lines = [f"{'stage':<12}{'count':>9}{'mean':>10}" + "".join(f"{'p' + str(p):>10}" for p in PERCENTILES)]
+        for stage in self.stages:
+            count, mean, values = self.summary(stage)
+            if count:
+                lines.append(f"{stage:<12}{count:>9}{mean * 1000:>8.2f}ms"
+                             + "".join(f"{v * 1000:>8.2f}ms" for v in values))
+        return "\n".join(lines)
+
+    def reset(self):
+        self.table[:] = 0
+
+    def close(self):
+        self.table = None
+        self.shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
+
+
+if __name__ == "__main__":
+    try:
+        histograms = LatencyHistograms(sys.argv[1] if len(sys.argv) > 1 else LATENCY_NAME)
+    except FileNotFoundError:
+        print("No latency histograms found. Is main.py running?")
+        sys.exit(1)
+    print(histograms.report())
+    histograms.close()
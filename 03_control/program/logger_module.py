@@ -0,0 +1,205 @@
+import os
+import csv
+import glob
+import time
+import queue
+import struct
+import threading
+import numpy as np
+
+from channel_module import shape_name, color_name
+
+LOG_DTYPE_V1 = np.dtype([
+    ('time_ms', np.int64),
+    ('frame_id', np.uint32),
+    ('track_id', np.uint32),
+    ('shape', np.uint8),
+    ('cx', np.float32),
+    ('cy', np.float32),
+    ('area', np.float32),
+    ('confidence', np.float32),
+])
+LOG_DTYPE = np.dtype([
+    ('time_ms', np.int64),
+    ('frame_id', np.uint32),
+    ('track_id', np.uint32),
+    ('shape', np.uint8),
+    ('color', np.uint8),
+    ('cx', np.float32),
+    ('cy', np.float32),
+    ('area', np.float32),
+    ('confidence', np.float32),
+])
+LOG_VERSION = 2
+LOG_DTYPES = {1: LOG_DTYPE_V1, 2: LOG_DTYPE}
+LOG_MAGIC = b'GBDET'
+LOG_HEADER = struct.Struct('<5sBH')
+
+CSV_HEADER = ['Timestamp', 'Frame', 'Track', 'Shape', 'Color', 'X_coord', 'Y_coord', 'Area', 'Confidence']
+EXTENSIONS = {'csv': '.csv', 'bin': '.det'}
+CLOSE_TIMEOUT = 5.0
+
+
+def read_segment(path):
+    if path.endswith(EXTENSIONS['bin']):
+        with open(path, 'rb') as file:
+            head = file.read(LOG_HEADER.size)
+        offset, version = 0, 1
+        if head.startswith(LOG_MAGIC) and len(head) == LOG_HEADER.size:
+            _, version, itemsize = LOG_HEADER.unpack(head)
+            if version not in LOG_DTYPES or LOG_DTYPES[version].itemsize != itemsize:
+                raise ValueError(f"{path} has unsupported detection log version {version}")
+            offset = LOG_HEADER.size
+        stored = np.fromfile(path, dtype=LOG_DTYPES[version], offset=offset)
+        if version == LOG_VERSION:
+            return stored
+        records = np.zeros(len(stored), dtype=LOG_DTYPE)
+        for name in stored.dtype.names:
+            records[name] = stored[name]
+        return records
+    with open(path, newline='') as file:
+        return list(csv.DictReader(file))
+
+
+class BatchWriter:
+    def __init__(self, name, queue_size=256, flush_interval=1.0):
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.file = None
+        self.dropped = 0
+        self.written = 0
+        self.failed = False
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def submit(self, records):
+        try:
+            self.queue.put_nowait(records)
+        except queue.Full:
+            self.dropped += len(records)
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        if self.thread.is_alive():
+            try:
+                self.queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+        self.thread.join(timeout=timeout)
+
+    def _run(self):
+        pending = []
+        deadline = time.monotonic() + self.flush_interval
+        running = True
+        while running:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if item is None:
+                    running = False
+                else:
+                    pending.append(item)
+            except queue.Empty:
+                pass
+            if pending and (not running or time.monotonic() >= deadline):
+                self._flush(np.concatenate(pending))
+                pending = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+        self._close_file()
+
+    def _flush(self, records):
+        written = self.written
+        try:
+            self._write(records)
+        except OSError as e:
+            self.dropped += len(records) - (self.written - written)
+            if not self.failed:
+                print(f"WARNING: {self.thread.name} could not write ({e}), dropping records until it recovers.")
+            self.failed = True
+            self._close_file()
+            return
+        if self.failed:
+            print(f"{self.thread.name} is writing again.")
+            self.failed = False
+
+    def _close_file(self):
+        if self.file is not None:
+            try:
+                self.file.close()
+            except OSError:
+                pass
+            self.file = None
+
+    def _write(self, records):
+        raise NotImplementedError
+
+
+class DetectionLogger(BatchWriter):
+    def __init__(self, directory='logs', fmt='csv', segment_rows=100000, max_segments=100,
+                 queue_size=256, flush_interval=1.0):
+        if fmt not in EXTENSIONS:
+            raise ValueError(f"Unknown log format: {fmt}")
+        super().__init__("detection-logger", queue_size, flush_interval)
+        self.directory = directory
+        self.fmt = fmt
+        self.segment_rows = segment_rows
+        self.max_segments = max_segments
+
+        self.clock_offset = time.time() - time.monotonic()
+        self.rows = 0
+        self.segment = 0
+        os.makedirs(directory, exist_ok=True)
+        self.thread.start()
+
+    def log(self, detections):
+        if len(detections) == 0:
+            return
+        records = np.zeros(len(detections), dtype=LOG_DTYPE)
+        records['time_ms'] = (detections['timestamp'] + self.clock_offset) * 1000.0
+        for name in ('frame_id', 'track_id', 'shape', 'color', 'cx', 'cy', 'area', 'confidence'):
+            records[name] = detections[name]
+        self.submit(records)
+
+    def _write(self, records):
+        while len(records):
+            if self.file is None or self.rows >= self.segment_rows:
+                self._rotate()
+            chunk = records[:self.segment_rows - self.rows]
+            records = records[len(chunk):]
+            if self.fmt == 'bin':
+                chunk.tofile(self.file)
+            else:
+                self.writer.writerows(self._csv_rows(chunk))
+            self.rows += len(chunk)
+            self.written += len(chunk)
+        self.file.flush()
+
+    def _csv_rows(self, chunk):
+        for r in chunk:
+            seconds, ms = divmod(int(r['time_ms']), 1000)
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(seconds)) + f".{ms:03d}"
+            yield [stamp, int(r['frame_id']), int(r['track_id']), shape_name(int(r['shape'])), color_name(int(r['color'])),
+                   int(r['cx']), int(r['cy']), int(r['area']), f"{r['confidence']:.2f}"]
+
+    def _rotate(self):
+        self._close_file()
+        os.makedirs(self.directory, exist_ok=True)
+        self.segment += 1
+        name = time.strftime("detections_%Y%m%d_%H%M%S") + f"_{self.segment:03d}" + EXTENSIONS[self.fmt]
+        path = os.path.join(self.directory, name)
+        if self.fmt == 'bin':
+            self.file = open(path, 'ab')
+            if self.file.tell() == 0:
+                self.file.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, LOG_DTYPE.itemsize))
+        else:
+            is_new = not os.path.exists(path)
+            self.file = open(path, 'a', newline='')
+            self.writer = csv.writer(self.file)
+            if is_new:
+                self.writer.writerow(CSV_HEADER)
+        self.rows = 0
+        self._prune()
+
+    def _prune(self):
+        pattern = os.path.join(self.directory, "detections_*" + EXTENSIONS[self.fmt])
+        segments = sorted(glob.glob(pattern))
+        for old in segments[:-self.max_segments]:
+            os.remove(old)
@@ -0,0 +1,90 @@
+import time
+import collections
+import tkinter as tk
+
+SEVERITIES = ('INFO', 'WARNING', 'ERROR')
+ALL = 'All'
+LOG_CAPACITY = 500
+REDRAW_MS = 250
+COLLAPSE_WINDOW = 10
+
+
+class LogEntry:
+    __slots__ = ('timestamp', 'severity', 'category', 'text', 'key', 'count')
+
+    def __init__(self, timestamp, severity, category, text, key):
+        self.timestamp = timestamp
+        self.severity = severity
+        self.category = category
+        self.text = text
+        self.key = key
+        self.count = 1
+
+    def format(self):
+        stamp = time.strftime('%H:%M:%S', time.localtime(self.timestamp))
+        repeat = f" (x{self.count})" if self.count > 1 else ""
+        return f"{stamp} {self.severity[0]} {self.text}{repeat}"
+
+
+class LogView(tk.Frame):
+    def __init__(self, master, categories=(), capacity=LOG_CAPACITY, redraw_ms=REDRAW_MS, width=50, height=15):
+        super().__init__(master)
+        self.entries = collections.deque(maxlen=capacity)
+        self.redraw_ms = redraw_ms
+        self.dirty = False
+        self.total = 0
+
+        filters = tk.Frame(self)
+        filters.pack(fill=tk.X)
+        self.category_var = tk.StringVar(value=ALL)
+        self.severity_var = tk.StringVar(value=SEVERITIES[0])
+        tk.Label(filters, text="Class:").pack(side=tk.LEFT)
+        tk.OptionMenu(filters, self.category_var, ALL, *categories, command=self.refilter).pack(side=tk.LEFT)
+        tk.Label(filters, text="Level:").pack(side=tk.LEFT, padx=(10, 0))
+        tk.OptionMenu(filters, self.severity_var, *SEVERITIES, command=self.refilter).pack(side=tk.LEFT)
+        self.count_label = tk.Label(filters, text="", fg="gray")
+        self.count_label.pack(side=tk.RIGHT)
+
+        self.text = tk.Text(self, width=width, height=height, font=("Arial", 10), state=tk.DISABLED)
+        self.text.pack(fill=tk.BOTH, expand=True)
+        self.after(self.redraw_ms, self._tick)
+
+    def log(self, text, severity='INFO', category=None, key=None, timestamp=None):
+        self.total += 1
+        self.dirty = True
+        timestamp = time.time() if timestamp is None else timestamp
+        key = (severity, category, text if key is None else key)
+        for i in range(1, min(COLLAPSE_WINDOW, len(self.entries)) + 1):
+            entry = self.entries[-i]
+            if entry.key == key:
+                del self.entries[-i]
+                entry.count += 1
+                entry.text = text
+                entry.timestamp = timestamp
+                self.entries.append(entry)
+                return
+        self.entries.append(LogEntry(timestamp, severity, category, text, key))
+
+    def refilter(self, *_):
+        self.dirty = True
+
+    def visible(self):
+        category = self.category_var.get()
+        level = SEVERITIES.index(self.severity_var.get())
+        for entry in reversed(self.entries):
+            if SEVERITIES.index(entry.severity) < level:
+                continue
+            if category != ALL and entry.category != category:
+                continue
+            yield entry
+
+    def _tick(self):
+        if self.dirty:
+            self.dirty = False
+            lines = [entry.format() for entry in self.visible()]
+            self.text.configure(state=tk.NORMAL)
+            self.text.delete("1.0", tk.END)
+            self.text.insert("1.0", "\n".join(lines))
+            self.text.configure(state=tk.DISABLED)
+            self.count_label.configure(text=f"{len(lines)} shown / {self.total} total")
+        self.after(self.redraw_ms, self._tick)
@@ -0,0 +1,73 @@
+import numpy as np
+
+from channel_module import make_detections
+
+POLICIES = ('latest', 'latest_per_track', 'drop_oldest')
+
+
+class TargetMailbox:
+    def __init__(self, capacity=64, policy='latest_per_track', max_age=2.0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown mailbox policy: {policy}")
+        self.capacity = 1 if policy == 'latest' else capacity
+        self.policy = policy
+        self.max_age = max_age
+        self.entries = make_detections(0)
+        self.accepted = 0
+        self.dropped = 0
+        self.stale = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def put(self, records, now):
+        if len(records) == 0:
+            return
+        fresh = now - records['timestamp'] <= self.max_age
+        self.stale += int(len(records) - np.count_nonzero(fresh))
+        records = records[fresh]
+        if len(records) == 0:
+            return
+        self.accepted += len(records)
+
+        if self.policy == 'latest_per_track':
+            records = self.last_per_track(records)
+            tracked = records['track_id'][records['track_id'] > 0]
+            replaced = np.isin(self.entries['track_id'], tracked) & (self.entries['track_id'] > 0)
+            self.coalesced += int(np.count_nonzero(replaced))
+            self.entries = self.entries[~replaced]
+
+        entries = np.concatenate([self.entries, records])
+        if len(entries) > self.capacity:
+            entries = entries[np.argsort(entries['timestamp'], kind='stable')]
+            self.dropped += len(entries) - self.capacity
+            entries = entries[-self.capacity:]
+        self.entries = entries
+
+    def last_per_track(self, records):
+        ids = records['track_id']
+        _, first_from_end = np.unique(ids[::-1], return_index=True)
+        keep = ids == 0
+        keep[len(ids) - 1 - first_from_end] = True
+        self.coalesced += int(len(ids) - np.count_nonzero(keep))
+        return records[keep]
+
+    def expire(self, now, until=None):
+        limit = self.entries['timestamp'] + self.max_age
+        if until is not None:
+            limit = np.maximum(limit, until)
+        fresh = now <= limit
+        self.stale += int(len(fresh) - np.count_nonzero(fresh))
+        self.entries = self.entries[fresh]
+        return fresh
+
+    def remove(self, mask):
+        self.entries = self.entries[~mask]
+
+    def clear(self):
+        self.entries = self.entries[:0]
+
+    def counters(self):
+        return {'accepted': self.accepted, 'dropped': self.dropped,
+                'stale': self.stale, 'coalesced': self.coalesced, 'depth': len(self.entries)}
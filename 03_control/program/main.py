@@ -1,26 +1,108 @@
-import tkinter as tk
-from multiprocessing import Process, Value, Event, Queue
 import time
-import queue
+START_TIME = time.monotonic()
+
+import tkinter as tk
+
+from worker_module import start_context, run_worker
+from channel_module import format_detection, shape_name, SHAPE_NAMES
+from logview_module import LogView
+from broker_module import DetectionBroker
+from preview_module import FrameBuffer
+from latency_module import LatencyHistograms, LATENCY_NAME
+from metrics_module import MetricsBlock, MetricsExporter, METRICS_NAME
+from params_module import ParamBlock, PARAMETERS, PARAMS_NAME, load_params, save_params
+from recorder_module import new_session
+
+ROBOT_PORT = '/dev/ttyUSB0'
+CAMERA_SOURCE = 0  # 'synthetic' feeds vision from the simulator window instead of the camera
+RECORD_SESSIONS = False
+WORKERS = ('vision', 'robot', 'display')
+VISION_STOP_TIMEOUT = 8.0
+
+
+class ParamEditor(tk.Toplevel):
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.title("Parameters")
+        self.entries = {}
+        _, values = app.params.read()
+        for row, (key, value) in enumerate(values.items()):
+            tk.Label(self, text=key, font=("Arial", 10)).grid(row=row, column=0, sticky="w", padx=5)
+            entry = tk.Entry(self, width=28)
+            entry.insert(0, " ".join(str(v) for v in value) if isinstance(value, tuple) else str(value))
+            entry.grid(row=row, column=1, padx=5, pady=1)
+            self.entries[key] = entry
+        buttons = tk.Frame(self)
+        buttons.grid(row=len(values), column=0, columnspan=2, pady=10)
+        tk.Button(buttons, text="APPLY", width=10, command=self.apply).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="RELOAD FILE", width=12, command=self.reload).pack(side=tk.LEFT, padx=5)
+
+    def parse(self):
+        values = {}
+        for key, entry in self.entries.items():
+            default = PARAMETERS[key]
+            parts = entry.get().split()
+            if isinstance(default, tuple):
+                if len(parts) != len(default):
+                    raise ValueError(f"{key} needs {len(default)} numbers")
+                values[key] = tuple(int(float(p)) for p in parts)
+            elif len(parts) != 1:
+                raise ValueError(f"{key} needs one number")
+            else:
+                values[key] = type(default)(float(parts[0]))
+        return values
+
+    def apply(self):
+        try:
+            values = self.parse()
+        except ValueError as e:
+            self.app.log_view.log(f"Parameters not applied: {e}", "ERROR")
+            return
+        self.app.params.write(values)
+        save_params(values)
+        self.app.log_view.log(f"Parameters applied (version {self.app.params.version})")
 
-from blockstest import run_display
-from visual_module import run_vision
-from robot_module import run_robot
+    def reload(self):
+        self.app.params.write(load_params())
+        self.destroy()
+        self.app.param_editor = ParamEditor(self.app)
 
 class RobotApp(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Industrial Robot Control HMI")
-        self.geometry("450x700")
+        self.geometry("450x910")
 
-        self.conveyor_running = Event()
-        self.conveyor_speed = Value('i', 5)
-        self.app_mode = Value('i', 0)
+        self.ctx = start_context()
+        self.conveyor_running = self.ctx.Event()
+        self.conveyor_speed = self.ctx.Value('i', 5)
+        self.app_mode = self.ctx.Value('i', 0)
+        self.stop_event = self.ctx.Event()
+        self.ready = {name: self.ctx.Value('d', 0.0) for name in WORKERS}
 
-        self.coord_queue = Queue()
+        self.broker = DetectionBroker(ctx=self.ctx)
+        self.robot_stream = self.broker.subscribe('robot', 'all')
+        self.log_stream = self.broker.subscribe('hmi', 'sampled', capacity=20, interval=0.2)
+        self.frame_buffer = FrameBuffer(ctx=self.ctx)
+        self.sim_camera = FrameBuffer(ctx=self.ctx) if CAMERA_SOURCE == 'synthetic' else None
+        self.latency = LatencyHistograms(LATENCY_NAME, create=True)
+        self.metrics = MetricsBlock(METRICS_NAME, create=True)
+        try:
+            self.exporter = MetricsExporter(self.metrics).start()
+        except OSError as e:
+            print(f"WARNING: Metrics exporter not started ({e}).")
+            self.exporter = None
+        self.p_preview = None
+        self.params = ParamBlock(PARAMS_NAME, create=True, values=load_params())
+        self.param_editor = None
+        self.session = new_session() if RECORD_SESSIONS else None
         self.setup_ui()
         self.start_systems()
         self.update_log_from_queue()
+        self.update_startup()
+        self.update_metrics()
+        self.protocol("WM_DELETE_WINDOW", self.shutdown)
 
     def setup_ui(self):
         tk.Label(self, text="CONTROL PANEL", font=("Arial", 24, "bold")).pack(pady=20)
@@ -38,6 +120,9 @@ class RobotApp(tk.Tk):
         self.status_label = tk.Label(self, text="CONVEYOR: STOPPED", fg="red", font=("Arial", 16, "bold"))
         self.status_label.pack(pady=10)
 
+        self.startup_label = tk.Label(self, text="STARTING...", fg="gray", font=("Arial", 10))
+        self.startup_label.pack()
+
         self.btn_start = tk.Button(self, text="START CONVEYOR", bg="green", fg="white",
                                    font=("Arial", 12, "bold"), width=20, command=self.start_conveyor)
         self.btn_start.pack(pady=5)
@@ -51,8 +136,19 @@ class RobotApp(tk.Tk):
         self.speed_slider.set(5)
         self.speed_slider.pack(pady=10)
 
-        self.log_box = tk.Text(self, width=50, height=15, font=("Arial", 10))
-        self.log_box.pack(pady=20)
+        self.btn_preview = tk.Button(self, text="CAMERA PREVIEW", font=("Arial", 12), width=20,
+                                     command=self.toggle_preview)
+        self.btn_preview.pack(pady=5)
+
+        self.btn_params = tk.Button(self, text="PARAMETERS", font=("Arial", 12), width=20,
+                                    command=self.open_params)
+        self.btn_params.pack(pady=5)
+
+        self.metrics_label = tk.Label(self, text="", font=("Courier", 9), justify=tk.LEFT)
+        self.metrics_label.pack(pady=(10, 0))
+
+        self.log_view = LogView(self, categories=SHAPE_NAMES)
+        self.log_view.pack(pady=20)
 
     def change_mode(self):
         value = self.mode_var.get()
@@ -66,35 +162,110 @@ class RobotApp(tk.Tk):
             self.btn_stop.configure(state="disabled")
 
     def start_systems(self):
-        self.p_vision = Process(target=run_vision, args=(self.coord_queue,))
-        self.p_vision.start()
+        self.p_vision = self.ctx.Process(target=run_worker,
+                                         args=('visual_module:run_vision', self.broker, self.frame_buffer, True,
+                                               self.sim_camera if self.sim_camera is not None else CAMERA_SOURCE),
+                                         kwargs={'latency': self.latency, 'ready': self.ready['vision'],
+                                                 'metrics': self.metrics, 'params': self.params,
+                                                 'record': self.session, 'stop_event': self.stop_event})
+        self.p_robot = self.ctx.Process(target=run_worker,
+                                        args=('robot_module:run_robot', self.robot_stream, self.conveyor_running,
+                                              self.conveyor_speed, self.stop_event, ROBOT_PORT),
+                                        kwargs={'latency': self.latency, 'ready': self.ready['robot'],
+                                                'metrics': self.metrics, 'params': self.params,
+                                                'record': self.session})
+        self.p_display = self.ctx.Process(target=run_worker,
+                                          args=('blockstest:run_display', self.conveyor_running,
+                                                self.conveyor_speed, self.app_mode),
+                                          kwargs={'ready': self.ready['display'], 'metrics': self.metrics,
+                                                  'frame_buffer': self.sim_camera})
+        self.workers = {'vision': self.p_vision, 'robot': self.p_robot, 'display': self.p_display}
+        for p in self.workers.values():
+            p.start()
 
-        self.p_display = Process(target=run_display, args=(self.conveyor_running, self.conveyor_speed, self.app_mode))
-        self.p_display.start()
+    def update_startup(self):
+        times = {name: ready.value - START_TIME for name, ready in self.ready.items() if ready.value}
+        failed = [name for name in WORKERS if name not in times and not self.workers[name].is_alive()]
+        parts = " ".join(f"{name} {times[name]:.1f}s" if name in times else f"{name} FAILED"
+                         for name in WORKERS if name in times or name in failed)
+        if len(times) + len(failed) == len(WORKERS):
+            total = max(times.values()) if times else time.monotonic() - START_TIME
+            self.startup_label.configure(text=f"READY IN {total:.1f} s ({parts})", fg="red" if failed else "green")
+            self.log_view.log(f"Startup: ready in {total:.2f} s ({parts})", "ERROR" if failed else "INFO")
+            return
+        self.startup_label.configure(text=f"STARTING... {time.monotonic() - START_TIME:.1f} s {parts}")
+        self.after(100, self.update_startup)
 
-        self.p_robot = Process(target=run_robot, args=(self.coord_queue,))
-        self.p_robot.start()
+    def open_params(self):
+        if self.param_editor is not None and self.param_editor.winfo_exists():
+            self.param_editor.lift()
+            return
+        self.param_editor = ParamEditor(self)
+
+    def toggle_preview(self):
+        if self.p_preview is not None and self.p_preview.is_alive():
+            self.p_preview.terminate()
+            self.p_preview = None
+            return
+        self.p_preview = self.ctx.Process(target=run_worker,
+                                          args=('preview_module:run_preview', self.frame_buffer))
+        self.p_preview.start()
 
     def update_log_from_queue(self):
-        try:
-            while True:
-                msg = self.coord_queue.get_nowait()
-                self.log_box.insert("1.0", f"{msg}\n")
-        except queue.Empty:
-            pass
+        for det in self.log_stream.read():
+            shape = shape_name(int(det['shape']))
+            severity = "WARNING" if shape in ("Unknown", "Overlap") else "INFO"
+            key = int(det['track_id']) or None
+            self.log_view.log(format_detection(det), severity, shape, key)
         self.after(100, self.update_log_from_queue)
 
+    def update_metrics(self):
+        snapshot = self.metrics.snapshot()
+        now = time.monotonic()
+        lines = []
+        for name, fmt in (("vision", "{fps:5.1f} fps  drops {frame_drops:.0f}  det {detections:.0f}"),
+                          ("robot", "{commands_per_s:5.1f} cmd/s  queue {queue_depth:.0f}  IK rej {ik_rejects:.0f}"),
+                          ("display", "{fps:5.1f} fps  shapes {shapes:.0f}")):
+            values = snapshot[name]
+            if not self.metrics.alive(name, now):
+                lines.append(f"{name.upper():<8}-- not running --")
+                continue
+            lines.append(f"{name.upper():<8}" + fmt.format(**values)
+                         + f"  cpu {values['cpu_percent']:3.0f}%  {values['rss_mb']:.0f} MB")
+        self.metrics_label.configure(text="\n".join(lines))
+        self.after(1000, self.update_metrics)
+
     def start_conveyor(self):
         self.conveyor_running.set()
         self.status_label.configure(text="CONVEYOR: RUNNING", fg="green")
+        self.log_view.log("Conveyor started")
 
     def stop_conveyor(self):
         self.conveyor_running.clear()
         self.status_label.configure(text="CONVEYOR: STOPPED", fg="red")
+        self.log_view.log("Conveyor stopped")
 
     def update_speed(self, val):
         self.conveyor_speed.value = int(float(val))
 
+    def shutdown(self):
+        self.stop_event.set()
+        self.p_robot.join(timeout=2.0)
+        self.p_vision.join(timeout=VISION_STOP_TIMEOUT)
+        for p in (self.p_robot, self.p_vision, self.p_display, self.p_preview):
+            if p is not None and p.is_alive():
+                p.terminate()
+        self.destroy()
+
 if __name__ == "__main__":
     app = RobotApp()
-    app.mainloop()
+    try:
+        app.mainloop()
+    finally:
+        if app.exporter is not None:
+            app.exporter.close()
+        for shared in (app.broker, app.frame_buffer, app.sim_camera, app.latency, app.metrics, app.params):
+            if shared is None:
+                continue
+            shared.close()
+            shared.unlink()
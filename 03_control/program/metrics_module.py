@@ -0,0 +1,182 @@
+import os
+import sys
+import time
+import resource
+import threading
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import shared_memory
+
+from channel_module import create_shared_memory, attach_shared_memory, SHAPE_NAMES
+
+METRICS_NAME = 'gesturebot_metrics'
+METRICS_PORT = 9108
+METRICS_INTERVAL = 1.0
+PROCESS_METRICS = ('heartbeat', 'cpu_percent', 'rss_mb')
+WORKER_METRICS = {
+    'vision': ('fps', 'frames', 'frame_drops', 'detections', 'picks', 'log_queue', 'log_dropped')
+              + tuple(f"det_{name.lower()}" for name in SHAPE_NAMES),
+    'robot': ('commands', 'commands_per_s', 'picks_received', 'queue_depth', 'overrun', 'missed',
+              'ik_rejects', 'in_flight', 'acked', 'naks', 'lost', 'crc_errors'),
+    'display': ('fps', 'frames', 'shapes', 'spawned'),
+}
+RATES = {'fps': 'frames', 'commands_per_s': 'commands'}
+MAX_METRICS = 32
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+class WorkerMetrics:
+    def __init__(self, name, row):
+        self.name = name
+        self.keys = PROCESS_METRICS + WORKER_METRICS[name]
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.row = row
+        self.last_tick = time.monotonic()
+        self.last_cpu = self._cpu_time()
+        self.last_counts = {key: 0.0 for key in RATES.values()}
+
+    @classmethod
+    def local(cls, name):
+        return cls(name, np.zeros(MAX_METRICS))
+
+    def set(self, key, value):
+        self.row[self.index[key]] = value
+
+    def add(self, key, value=1):
+        self.row[self.index[key]] += value
+
+    def get(self, key):
+        return float(self.row[self.index[key]])
+
+    def values(self):
+        return {key: float(self.row[i]) for i, key in enumerate(self.keys)}
+
+    def _cpu_time(self):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime
+
+    def _rss_mb(self):
+        try:
+            with open('/proc/self/statm') as file:
+                return int(file.read().split()[1]) * PAGE_SIZE / 2**20
+        except OSError:
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+    def tick(self, now=None):
+        now = time.monotonic() if now is None else now
+        elapsed = now - self.last_tick
+        if elapsed < METRICS_INTERVAL:
+            return
+        for rate, counter in RATES.items():
+            if rate in self.index:
+                count = self.get(counter)
+                self.set(rate, (count - self.last_counts[counter]) / elapsed)
+                self.last_counts[counter] = count
+        cpu = self._cpu_time()
+        self.set('cpu_percent', 100.0 * (cpu - self.last_cpu) / elapsed)
+        self.set('rss_mb', self._rss_mb())
+        self.set('heartbeat', now)
+        self.last_cpu = cpu
+        self.last_tick = now
+
+
+class MetricsBlock:
+    def __init__(self, name=METRICS_NAME, create=False):
+        self.workers = tuple(WORKER_METRICS)
+        self.shape = (len(self.workers), MAX_METRICS)
+        self.owner = create
+        size = int(np.prod(self.shape)) * 8
+        if create:
+            try:
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = create_shared_memory(size, name)
+        else:
+            self.shm = attach_shared_memory(name)
+        self.name = self.shm.name
+        self.table = np.ndarray(self.shape, dtype=np.float64, buffer=self.shm.buf)
+        if create:
+            self.table[:] = 0
+
+    def __getstate__(self):
+        return {'name': self.name}
+
+    def __setstate__(self, state):
+        self.__init__(state['name'])
+
+    def worker(self, name):
+        return WorkerMetrics(name, self.table[self.workers.index(name)])
+
+    def snapshot(self):
+        return {name: self.worker(name).values() for name in self.workers}
+
+    def alive(self, name, now=None, timeout=3 * METRICS_INTERVAL):
+        now = time.monotonic() if now is None else now
+        return now - self.table[self.workers.index(name), 0] < timeout
+
+    def render_text(self):
+        now = time.monotonic()
+        lines = []
+        for worker, values in self.snapshot().items():
+            lines.append(f"gesturebot_up{{worker=\"{worker}\"}} {int(self.alive(worker, now))}")
+            for key, value in values.items():
+                if key != 'heartbeat':
+                    lines.append(f"gesturebot_{key}{{worker=\"{worker}\"}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        self.table = None
+        self.shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
+
+
+def worker_metrics(block, name):
+    if block is None:
+        return WorkerMetrics.local(name)
+    return block.worker(name)
+
+
+class MetricsExporter:
+    def __init__(self, block, host='127.0.0.1', port=METRICS_PORT):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = block.render_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-exporter", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    try:
+        metrics = MetricsBlock(sys.argv[1] if len(sys.argv) > 1 else METRICS_NAME)
+    except FileNotFoundError:
+        print("No metrics found. Is main.py running?")
+        sys.exit(1)
+    sys.stdout.write(metrics.render_text())
+    metrics.close()
@@ -0,0 +1,150 @@
+import json
+import time
+import inspect
+import numpy as np
+from dataclasses import asdict
+from multiprocessing import shared_memory
+
+from channel_module import create_shared_memory, attach_shared_memory
+from color_module import DEFAULT_COLOR_RANGES
+from kinematics_module import Geometry
+from shape_module import ShapeClassifier
+
+PARAMS_NAME = 'gesturebot_params'
+PARAMS_FILE = 'params.json'
+
+
+def hsv_params(ranges):
+    values = {}
+    for name, bounds in ranges.items():
+        for i, (lower, upper) in enumerate(bounds):
+            values[f"hsv_{name.lower()}{i + 1 if i else ''}"] = tuple(lower) + tuple(upper)
+    return values
+
+
+CLASSIFIER_DEFAULTS = {name: p.default for name, p in inspect.signature(ShapeClassifier).parameters.items()}
+GEOMETRY_DEFAULTS = asdict(Geometry())
+PARAMETERS = {**CLASSIFIER_DEFAULTS, **hsv_params(DEFAULT_COLOR_RANGES), **GEOMETRY_DEFAULTS}
+VISION_PARAMS = tuple(CLASSIFIER_DEFAULTS)
+GEOMETRY_PARAMS = tuple(GEOMETRY_DEFAULTS)
+
+SIZES = {key: len(np.atleast_1d(value)) for key, value in PARAMETERS.items()}
+OFFSETS = dict(zip(PARAMETERS, np.cumsum([0] + list(SIZES.values()))[:-1].tolist()))
+VALUE_COUNT = sum(SIZES.values())
+HEADER_WORDS = 2
+
+
+def color_ranges(values):
+    ranges = {}
+    for key, value in values.items():
+        if key.startswith('hsv_'):
+            name = key[4:].rstrip('0123456789').capitalize()
+            ranges.setdefault(name, []).append((tuple(value[:3]), tuple(value[3:])))
+    return ranges
+
+
+def load_params(path=PARAMS_FILE):
+    values = dict(PARAMETERS)
+    try:
+        with open(path) as file:
+            stored = json.load(file)
+    except FileNotFoundError:
+        return values
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Could not read {path} ({e}), using defaults.")
+        return values
+    for key, value in stored.items():
+        if key not in PARAMETERS:
+            print(f"WARNING: Unknown parameter '{key}' in {path} ignored.")
+        elif len(np.atleast_1d(value)) != SIZES[key]:
+            print(f"WARNING: Parameter '{key}' in {path} has the wrong length, ignored.")
+        else:
+            values[key] = value
+    return values
+
+
+def save_params(values, path=PARAMS_FILE):
+    with open(path, 'w') as file:
+        json.dump({key: values[key] for key in PARAMETERS}, file, indent=2)
+
+
+class ParamBlock:
+    def __init__(self, name=PARAMS_NAME, create=False, values=None):
+        size = (HEADER_WORDS + VALUE_COUNT) * 8
+        self.owner = create
+        if create:
+            try:
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = create_shared_memory(size, name)
+        else:
+            self.shm = attach_shared_memory(name)
+        self.name = self.shm.name
+        self.header = np.ndarray((HEADER_WORDS,), dtype=np.uint64, buffer=self.shm.buf)
+        self.data = np.ndarray((VALUE_COUNT,), dtype=np.float64, buffer=self.shm.buf, offset=HEADER_WORDS * 8)
+        self.last_version = 0
+        if create:
+            self.header[:] = 0
+            self.write(PARAMETERS if values is None else values)
+
+    def __getstate__(self):
+        return {'name': self.name}
+
+    def __setstate__(self, state):
+        self.__init__(state['name'])
+
+    @property
+    def version(self):
+        return int(self.header[0])
+
+    def write(self, values):
+        data = self.data.copy()
+        for key, value in values.items():
+            data[OFFSETS[key]:OFFSETS[key] + SIZES[key]] = np.atleast_1d(value)
+        self.header[1] += 1
+        self.data[:] = data
+        self.header[0] += 1
+        self.header[1] += 1
+
+    def read(self, retries=100):
+        for _ in range(retries):
+            seq = int(self.header[1])
+            if seq % 2:
+                time.sleep(0.0001)
+                continue
+            version = int(self.header[0])
+            data = self.data.copy()
+            if int(self.header[1]) == seq:
+                return version, self.unpack(data)
+        raise RuntimeError("Parameter block is being rewritten continuously")
+
+    def unpack(self, data):
+        values = {}
+        for key, default in PARAMETERS.items():
+            chunk = data[OFFSETS[key]:OFFSETS[key] + SIZES[key]]
+            if isinstance(default, tuple):
+                values[key] = tuple(int(v) for v in chunk)
+            elif isinstance(default, int):
+                values[key] = int(chunk[0])
+            else:
+                values[key] = float(chunk[0])
+        return values
+
+    def poll(self):
+        if self.version == self.last_version:
+            return None
+        version, values = self.read()
+        self.last_version = version
+        return values
+
+    def close(self):
+        self.header = None
+        self.data = None
+        self.shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
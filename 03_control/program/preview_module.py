@@ -0,0 +1,175 @@
+import time
+import numpy as np
+import multiprocessing
+
+from channel_module import DETECTION_DTYPE, create_shared_memory, attach_shared_memory, shape_name, color_name
+
+FRAME_MAX_W = 1280
+FRAME_MAX_H = 720
+MAX_OVERLAY = 128
+READER_TIMEOUT = 1.0
+
+PREVIEW_WINDOW = "Jetson Ultimate Vision"
+PREVIEW_SIZE = (1480, 320)
+
+HEADER_DTYPE = np.dtype([
+    ('seq', np.uint64),
+    ('frame_id', np.uint64),
+    ('timestamp', np.float64),
+    ('height', np.uint32),
+    ('width', np.uint32),
+    ('count', np.uint32),
+    ('requested', np.float64),
+], align=True)
+
+
+class FrameBuffer:
+    def __init__(self, max_w=FRAME_MAX_W, max_h=FRAME_MAX_H, max_overlay=MAX_OVERLAY, name=None, cond=None,
+                 ctx=multiprocessing):
+        self.max_w = max_w
+        self.max_h = max_h
+        self.max_overlay = max_overlay
+        size = (HEADER_DTYPE.itemsize + max_h * max_w * 3
+                + max_overlay * (DETECTION_DTYPE.itemsize + 16))
+        self.owner = name is None
+        if not self.owner and cond is None:
+            raise ValueError("Attaching a frame buffer needs the owner's Condition; pass the buffer to the worker")
+        if self.owner:
+            self.shm = create_shared_memory(size)
+        else:
+            self.shm = attach_shared_memory(name)
+        self.name = self.shm.name
+        self.cond = ctx.Condition() if self.owner else cond
+        self._map()
+        if self.owner:
+            self.header[0] = 0
+            self.header['requested'] = -np.inf
+
+    def _map(self):
+        buf = self.shm.buf
+        offset = 0
+        self.header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=buf, offset=offset)
+        offset += HEADER_DTYPE.itemsize
+        self.image = np.ndarray((self.max_h, self.max_w, 3), dtype=np.uint8, buffer=buf, offset=offset)
+        offset += self.image.nbytes
+        self.detections = np.ndarray((self.max_overlay,), dtype=DETECTION_DTYPE, buffer=buf, offset=offset)
+        offset += self.detections.nbytes
+        self.boxes = np.ndarray((self.max_overlay, 4), dtype=np.int32, buffer=buf, offset=offset)
+
+    def __getstate__(self):
+        return {'max_w': self.max_w, 'max_h': self.max_h,
+                'max_overlay': self.max_overlay, 'name': self.name, 'cond': self.cond}
+
+    def __setstate__(self, state):
+        self.__init__(state['max_w'], state['max_h'], state['max_overlay'], state['name'], state['cond'])
+
+    @property
+    def seq(self):
+        return int(self.header['seq'][0])
+
+    def wanted(self, now=None):
+        now = time.monotonic() if now is None else now
+        return now - float(self.header['requested'][0]) < READER_TIMEOUT
+
+    def publish(self, frame, detections, boxes, frame_id=0, timestamp=0.0):
+        if not self.wanted():
+            return False
+        h = min(frame.shape[0], self.max_h)
+        w = min(frame.shape[1], self.max_w)
+        n = min(len(detections), self.max_overlay)
+        seq = self.seq
+
+        self.header['seq'] = seq + 1
+        self.image[:h, :w] = frame[:h, :w]
+        self.detections[:n] = detections[:n]
+        self.boxes[:n] = boxes[:n]
+        self.header['frame_id'] = frame_id
+        self.header['timestamp'] = timestamp
+        self.header['height'] = h
+        self.header['width'] = w
+        self.header['count'] = n
+        with self.cond:
+            self.header['seq'] = seq + 2
+            self.cond.notify_all()
+        return True
+
+    def wait(self, last_seq=None, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ready = lambda: self.seq != 0 and self.seq != last_seq and self.seq % 2 == 0
+        while True:
+            self.header['requested'] = time.monotonic()
+            chunk = READER_TIMEOUT / 2
+            if deadline is not None:
+                chunk = min(chunk, deadline - time.monotonic())
+                if chunk <= 0:
+                    return ready()
+            with self.cond:
+                if self.cond.wait_for(ready, chunk):
+                    return True
+
+    def latest(self, last_seq=None, retries=3):
+        self.header['requested'] = time.monotonic()
+        for _ in range(retries):
+            seq = self.seq
+            if seq % 2:
+                time.sleep(0.001)
+                continue
+            if seq == 0 or seq == last_seq:
+                return None
+            head = self.header[0].copy()
+            h, w, n = int(head['height']), int(head['width']), int(head['count'])
+            frame = self.image[:h, :w].copy()
+            detections = self.detections[:n].copy()
+            boxes = self.boxes[:n].copy()
+            if self.seq == seq:
+                return seq, head, frame, detections, boxes
+        return None
+
+    def close(self):
+        self.header = self.image = self.detections = self.boxes = None
+        self.shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
+
+
+def render_overlay(frame, detections, boxes, size=PREVIEW_SIZE):
+    import cv2
+    display = cv2.resize(frame, size)
+    scale_x, scale_y = size[0] / frame.shape[1], size[1] / frame.shape[0]
+    for det, (x, y, w, h) in zip(detections, boxes):
+        shape = shape_name(int(det['shape']))
+        cX, cY = int(det['cx']), int(det['cy'])
+        draw_x, draw_y = int(cX * scale_x), int(cY * scale_y)
+
+        color = (0, 0, 255) if shape in ["Overlap", "Unknown"] else (0, 255, 0)
+        cv2.rectangle(display, (int(x * scale_x), int(y * scale_y)),
+                      (int((x + w) * scale_x), int((y + h) * scale_y)), color, 2)
+
+        label = f"#{int(det['track_id'])} {color_name(int(det['color']))} {shape} (X:{cX} Y:{cY})"
+        cv2.putText(display, label, (draw_x - 60, draw_y - 15),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+        cv2.circle(display, (draw_x, draw_y), 3, (255, 255, 255), -1)
+    return display
+
+
+def run_preview(frame_buffer, fps=10):
+    import cv2
+    cv2.namedWindow(PREVIEW_WINDOW, cv2.WINDOW_NORMAL)
+    cv2.resizeWindow(PREVIEW_WINDOW, 1200, 300)
+
+    period = 1.0 / fps
+    last_seq = None
+    while True:
+        start = time.monotonic()
+        latest = frame_buffer.latest(last_seq) if frame_buffer.wait(last_seq, period) else None
+        if latest is not None:
+            last_seq, _, frame, detections, boxes = latest
+            cv2.imshow(PREVIEW_WINDOW, render_overlay(frame, detections, boxes))
+
+        wait_ms = max(1, int((period - (time.monotonic() - start)) * 1000))
+        if cv2.waitKey(wait_ms) & 0xFF == ord('q'): break
+        if cv2.getWindowProperty(PREVIEW_WINDOW, cv2.WND_PROP_VISIBLE) < 1: break
+
+    cv2.destroyAllWindows()
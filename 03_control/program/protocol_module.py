@@ -0,0 +1,157 @@
+import struct
+
+SYNC = b'\xa5\x5a'
+HEADER = struct.Struct('<BBB')
+CRC = struct.Struct('<H')
+MAX_PAYLOAD = 255
+FRAME_OVERHEAD = len(SYNC) + HEADER.size + CRC.size
+
+CMD_POSITION = 0x01
+CMD_SPEED = 0x02
+CMD_ACCEL = 0x03
+CMD_FEEDBACK = 0x04
+CMD_ACK = 0x80
+CMD_NAK = 0x81
+CMD_NAK_UNKNOWN = 0x82
+CMD_STATE = 0x84
+
+STATUS_OK = 0
+STATUS_BAD_CRC = 1
+STATUS_BAD_COMMAND = 2
+
+ACCEL_UNIT = 100.0  # steps/s^2 per unit of the accel command
+
+POSITION = struct.Struct('<HH')
+SPEED = struct.Struct('<HH')
+ACCEL = struct.Struct('<BB')
+ACK = struct.Struct('<BB')
+STATUS = struct.Struct('<B')
+STATE = struct.Struct('<HhhHhh')
+
+
+def _make_crc_table():
+    table = []
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) & 0xFFFF if crc & 0x8000 else (crc << 1) & 0xFFFF
+        table.append(crc)
+    return table
+
+
+CRC_TABLE = _make_crc_table()
+
+
+def crc16(data, crc=0xFFFF):
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ CRC_TABLE[(crc >> 8) ^ byte]
+    return crc
+
+
+def encode_frame(seq, cmd, payload=b''):
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f"Payload too long: {len(payload)} bytes")
+    body = HEADER.pack(len(payload), seq & 0xFF, cmd) + payload
+    return SYNC + body + CRC.pack(crc16(body))
+
+
+def encode_position(seq, step1, step2):
+    return encode_frame(seq, CMD_POSITION, POSITION.pack(step1, step2))
+
+
+def encode_speed(seq, speed1, speed2):
+    return encode_frame(seq, CMD_SPEED, SPEED.pack(speed1, speed2))
+
+
+def encode_accel(seq, acc1, acc2):
+    return encode_frame(seq, CMD_ACCEL, ACCEL.pack(acc1, acc2))
+
+
+def encode_feedback_request(seq):
+    return encode_frame(seq, CMD_FEEDBACK)
+
+
+def encode_ack(seq, status=STATUS_OK, nak=False):
+    return encode_frame(seq, CMD_NAK if nak else CMD_ACK, ACK.pack(seq & 0xFF, status))
+
+
+def encode_nak_unknown(seq, status=STATUS_BAD_CRC):
+    return encode_frame(seq, CMD_NAK_UNKNOWN, STATUS.pack(status))
+
+
+def encode_state(seq, m1, m2):
+    return encode_frame(seq, CMD_STATE, STATE.pack(*m1, *m2))
+
+
+def encode_ascii_position(step1, step2):
+    return f"M1:{step1},M2:{step2}\n".encode('utf-8')
+
+
+def decode_payload(cmd, payload):
+    if cmd == CMD_POSITION:
+        return POSITION.unpack(payload)
+    if cmd == CMD_SPEED:
+        return SPEED.unpack(payload)
+    if cmd == CMD_ACCEL:
+        return ACCEL.unpack(payload)
+    if cmd in (CMD_ACK, CMD_NAK):
+        return ACK.unpack(payload)
+    if cmd == CMD_NAK_UNKNOWN:
+        return STATUS.unpack(payload)
+    if cmd == CMD_STATE:
+        values = STATE.unpack(payload)
+        return values[:3], values[3:]
+    return ()
+
+
+class Frame:
+    __slots__ = ('seq', 'cmd', 'payload')
+
+    def __init__(self, seq, cmd, payload):
+        self.seq = seq
+        self.cmd = cmd
+        self.payload = payload
+
+    def values(self):
+        return decode_payload(self.cmd, self.payload)
+
+    def __repr__(self):
+        return f"Frame(seq={self.seq}, cmd=0x{self.cmd:02x}, payload={self.payload.hex()})"
+
+
+class FrameDecoder:
+    def __init__(self):
+        self.buffer = bytearray()
+        self.frames = 0
+        self.crc_errors = 0
+        self.skipped = 0
+
+    def feed(self, data):
+        self.buffer += data
+        frames = []
+        while True:
+            start = self.buffer.find(SYNC)
+            if start < 0:
+                keep = 1 if self.buffer.endswith(SYNC[:1]) else 0
+                self.skipped += len(self.buffer) - keep
+                del self.buffer[:len(self.buffer) - keep]
+                break
+            if start:
+                self.skipped += start
+                del self.buffer[:start]
+            if len(self.buffer) < len(SYNC) + HEADER.size:
+                break
+            length, seq, cmd = HEADER.unpack_from(self.buffer, len(SYNC))
+            total = FRAME_OVERHEAD + length
+            if len(self.buffer) < total:
+                break
+            body = bytes(self.buffer[len(SYNC):total - CRC.size])
+            (crc,) = CRC.unpack_from(self.buffer, total - CRC.size)
+            if crc != crc16(body):
+                self.crc_errors += 1
+                del self.buffer[:1]
+                continue
+            frames.append(Frame(seq, cmd, body[HEADER.size:]))
+            self.frames += 1
+            del self.buffer[:total]
+        return frames
@@ -0,0 +1,110 @@
+import os
+import glob
+import time
+import numpy as np
+
+from channel_module import DETECTION_DTYPE
+from logger_module import BatchWriter
+
+SESSION_DIR = 'sessions'
+RECORD_EXTENSION = '.rec'
+MAX_SEGMENT_BYTES = 64 << 20
+MAX_SEGMENTS = 16
+RECORD_MAGIC = b'GBREC001'
+KIND_DETECTION = 1
+KIND_PICK = 2
+KIND_COMMAND = 3
+KIND_NAMES = {KIND_DETECTION: 'detection', KIND_PICK: 'pick', KIND_COMMAND: 'command'}
+
+RECORD_DTYPE = np.dtype([
+    ('kind', np.uint8),
+    ('time', np.float64),
+    ('step1', np.int32),
+    ('step2', np.int32),
+    ('detection', DETECTION_DTYPE),
+], align=True)
+HEADER = RECORD_MAGIC + np.uint32(RECORD_DTYPE.itemsize).tobytes() + bytes(4)
+
+
+def new_session(directory=SESSION_DIR):
+    path = os.path.join(directory, time.strftime('%Y%m%d_%H%M%S'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class SessionRecorder(BatchWriter):
+    def __init__(self, path, flush_interval=1.0, max_bytes=MAX_SEGMENT_BYTES, max_segments=MAX_SEGMENTS,
+                 queue_size=256):
+        super().__init__("session-recorder", queue_size, flush_interval)
+        self.stem = path[:-len(RECORD_EXTENSION)] if path.endswith(RECORD_EXTENSION) else path
+        self.max_bytes = max_bytes
+        self.max_segments = max_segments
+        self.size = 0
+        self.segment = -1
+        self.thread.start()
+
+    def record(self, kind, detections, now=None, step1=0, step2=0):
+        now = time.monotonic() if now is None else now
+        if len(detections) == 0:
+            return
+        records = np.zeros(len(detections), dtype=RECORD_DTYPE)
+        records['kind'] = kind
+        records['time'] = now
+        records['step1'] = step1
+        records['step2'] = step2
+        records['detection'] = detections
+        self.submit(records)
+
+    def _write(self, records):
+        while len(records):
+            if self.file is None or self.size >= self.max_bytes:
+                self._rotate()
+            room = max(1, (self.max_bytes - self.size) // RECORD_DTYPE.itemsize)
+            chunk = records[:room]
+            records = records[len(chunk):]
+            self.file.write(chunk.tobytes())
+            self.size += chunk.nbytes
+            self.written += len(chunk)
+        self.file.flush()
+
+    def _rotate(self):
+        self._close_file()
+        os.makedirs(os.path.dirname(self.stem) or '.', exist_ok=True)
+        self.segment += 1
+        self.file = open(f"{self.stem}_{self.segment:03d}{RECORD_EXTENSION}", 'wb')
+        self.file.write(HEADER)
+        self.size = len(HEADER)
+        segments = sorted(glob.glob(f"{glob.escape(self.stem)}_*{RECORD_EXTENSION}"))
+        for old in segments[:-self.max_segments]:
+            os.remove(old)
+
+
+def open_recording(path):
+    with open(path, 'rb') as file:
+        header = file.read(len(HEADER))
+    if header != HEADER:
+        raise ValueError(f"{path} is not a session recording of this version")
+    count = (os.path.getsize(path) - len(HEADER)) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=len(HEADER), shape=(count,))
+
+
+def load_session(path):
+    files = sorted(glob.glob(os.path.join(path, '*' + RECORD_EXTENSION))) if os.path.isdir(path) else [path]
+    parts = [np.asarray(open_recording(f)) for f in files]
+    if not parts:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    records = np.concatenate(parts)
+    return records[np.argsort(records['time'], kind='stable')]
+
+
+def summarize(records):
+    counts = np.bincount(records['kind'], minlength=max(KIND_NAMES) + 1)
+    span = records['time'][-1] - records['time'][0] if len(records) else 0.0
+    return " ".join(f"{KIND_NAMES[k]}s={counts[k]}" for k in KIND_NAMES) + f" span={span:.1f}s"
+
+
+def detections_of(records, kind):
+    selected = records[records['kind'] == kind]
+    return selected['time'].copy(), selected['detection'].copy()
@@ -0,0 +1,74 @@
+import os
+import argparse
+import threading
+import time
+import numpy as np
+
+from broker_module import DetectionBroker
+from recorder_module import load_session, new_session, summarize, detections_of, KIND_PICK, KIND_COMMAND
+from robot_module import run_robot, SIM_PORT, SERIAL_PROTOCOL
+from serial_module import SETTLE_TIME
+
+REPLAY_DIR = os.path.join('sessions', 'replays')
+TAIL_TIME = 2.0
+
+
+def shift_batch(batch, recorded_time, due, speed):
+    batch = batch.copy()
+    for field in ('timestamp', 't_detect'):
+        batch[field] = due - (recorded_time - batch[field]) / speed
+    batch['vx'] *= speed
+    batch['vy'] *= speed
+    return batch
+
+
+def run_replay(path, speed=1.0, port=SIM_PORT, protocol=SERIAL_PROTOCOL):
+    records = load_session(path)
+    print(f"Session {path}: {summarize(records)}")
+    times, picks = detections_of(records, KIND_PICK)
+    recorded_commands = int(np.count_nonzero(records['kind'] == KIND_COMMAND))
+    if len(picks) == 0:
+        print("Nothing to replay.")
+        return
+
+    broker = DetectionBroker()
+    subscription = broker.subscribe('robot')
+    stop_event = threading.Event()
+    output = new_session(REPLAY_DIR)
+    robot = threading.Thread(target=run_robot, args=(subscription, None, None, stop_event, port, protocol),
+                             kwargs={'record': output})
+    robot.start()
+    time.sleep(0.5 if port == SIM_PORT else SETTLE_TIME + 0.5)
+
+    frames, starts = np.unique(times, return_index=True)
+    bounds = list(starts[1:]) + [len(times)]
+    start = time.monotonic()
+    for recorded_time, first, last in zip(frames, starts, bounds):
+        due = start + (recorded_time - frames[0]) / speed
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        broker.publish(shift_batch(picks[first:last], recorded_time, due, speed))
+    elapsed = time.monotonic() - start
+    time.sleep(TAIL_TIME)
+
+    stop_event.set()
+    robot.join()
+    replayed = load_session(output)
+    replayed_commands = int(np.count_nonzero(replayed['kind'] == KIND_COMMAND))
+    print(f"Replayed {len(picks)} picks from {frames[-1] - frames[0]:.1f} s of traffic in {elapsed:.1f} s "
+          f"({speed:g}x)")
+    print(f"Commands: recorded={recorded_commands} replayed={replayed_commands} -> {output}")
+    broker.close()
+    broker.unlink()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded session into the robot module")
+    parser.add_argument("session", help="session directory or a single .rec file")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor (2 = twice as fast)")
+    parser.add_argument("--port", default=SIM_PORT, help="serial port, or 'sim' for the arm simulator")
+    parser.add_argument("--protocol", default=SERIAL_PROTOCOL, choices=('binary', 'ascii'))
+    args = parser.parse_args()
+
+    run_replay(args.session, args.speed, args.port, args.protocol)
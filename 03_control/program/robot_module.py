@@ -1,96 +1,165 @@
+import os
 import time
-import re
-import math
-import serial
-
-BASE_D = 100.0
-L1 = 140.0
-L2 = 190.0
-
-M1_X = -BASE_D / 2.0
-M1_Y = 0.0
-M2_X = BASE_D / 2.0
-M2_Y = 0.0
-
-def calculate_ik(target_x, target_y):
-    dx1 = target_x - M1_X
-    dy1 = target_y - M1_Y
-    d1 = math.hypot(dx1, dy1)
-
-    dx2 = target_x - M2_X
-    dy2 = target_y - M2_Y
-    d2 = math.hypot(dx2, dy2)
-
-    if d1 > (L1 + L2) or d2 > (L1 + L2):
-        return None, None
-    if d1 < abs(L1 - L2) or d2 < abs(L1 - L2):
-        return None, None
-
-    alpha1 = math.atan2(dy1, dx1)
-    beta1 = math.acos((d1**2 + L1**2 - L2**2) / (2 * L1 * d1))
-    angle_m1_rad = alpha1 + beta1
-
-    alpha2 = math.atan2(dy2, dx2)
-    beta2 = math.acos((d2**2 + L1**2 - L2**2) / (2 * L1 * d2))
-    angle_m2_rad = alpha2 - beta2
-
-    return math.degrees(angle_m1_rad), math.degrees(angle_m2_rad)
-
-
-M1_CENTER = 2524
-M2_CENTER = 2048
-
-def degrees_to_steps(degrees, is_left_motor):
-    if is_left_motor:
-        steps = int(M1_CENTER + ((degrees - 90.0) / 360.0) * 4096)
-    else:
-        steps = int(M2_CENTER + ((degrees - 90.0) / 360.0) * 4096)
-    return max(0, min(4095, steps))
-
-
-def run_robot(coord_queue):
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from channel_module import shape_name, color_name
+from kinematics_module import pixel_to_table, StepLookup, Geometry
+from params_module import GEOMETRY_PARAMS
+from recorder_module import SessionRecorder, KIND_COMMAND
+from scheduler_module import PickScheduler, SERVO_SPEED, SERVO_ACCEL
+from serial_module import SerialClient, SETTLE_TIME
+from worker_module import mark_ready
+from metrics_module import worker_metrics
+
+SERIAL_PORT = '/dev/ttyUSB0'
+SIM_PORT = 'sim'
+SERIAL_PROTOCOL = 'ascii'
+IDLE_WAIT = 0.5
+RETRY_WAIT = 0.05
+STATS_INTERVAL = 5.0
+MOVE_TIMEOUT = 1.0
+LATENCY_INTERVAL = 60.0
+
+def run_robot(subscription, conveyor_running=None, conveyor_speed=None, stop_event=None,
+              port=SERIAL_PORT, protocol=SERIAL_PROTOCOL, latency=None, ready=None,
+              metrics=None, params=None, record=None):
     print("Robot module starting...")
-
-    try:
-        arduino = serial.Serial('/dev/ttyUSB0', 115200, timeout=1)
-        time.sleep(2)
-        print("Robot connected via USB successfully!")
-    except Exception as e:
-        print(f"WARNING: Robot board not found ({e}).")
-        arduino = None
-
-    while True:
-        if not coord_queue.empty():
-            msg = coord_queue.get()
-
-            match = re.search(r'X:(\d+)\s+Y:(\d+)', msg)
-            if match:
-                pixel_x = int(match.group(1))
-                pixel_y = int(match.group(2))
-
-                table_width_mm = 268.2
-                table_height_mm = 58.0
-                offset_y = 100.0
-
-                scale_x_factor = 1.0
-                scale_y_factor = 1.0
-                camera_shift_x = 0.0
-
-                corrected_pixel_y = 320.0 - pixel_y
-
-                target_x = ((pixel_x / 1480.0) * table_width_mm - (table_width_mm / 2.0)) * scale_x_factor + camera_shift_x
-                target_y = ((corrected_pixel_y / 320.0) * table_height_mm) * scale_y_factor + offset_y
-
-                ang_left, ang_right = calculate_ik(target_x, target_y)
-
-                if ang_left is not None:
-                    step1 = degrees_to_steps(ang_left, True)
-                    step2 = degrees_to_steps(ang_right, False)
-
-                    command = f"M1:{step1},M2:{step2}\n"
-                    print(f"Target: {target_x:.1f}x{target_y:.1f} mm -> Angles: L:{ang_left:.1f} R:{ang_right:.1f} -> Sending: {command.strip()}")
-
-                    if arduino:
-                        arduino.write(command.encode('utf-8'))
-
-        time.sleep(0.02)
+    values = params.poll() if params is not None else None
+    geometry = Geometry(**{key: values[key] for key in GEOMETRY_PARAMS}) if values is not None else Geometry()
+    simulator = None
+    if port == SIM_PORT:
+        from arm_sim import ArmSimulator
+        simulator = ArmSimulator(verbose=True, protocol=protocol, geometry=geometry).start()
+        port = simulator.port
+
+    arduino = SerialClient(port, protocol=protocol, latency=latency)
+    arduino.start(settle=0.0 if simulator is not None else SETTLE_TIME)
+    speed = int(SERVO_SPEED)
+    arduino.set_speed(speed, speed)
+    arduino.set_accel(SERVO_ACCEL, SERVO_ACCEL)
+    connecting = True
+
+    scheduler = PickScheduler(StepLookup.load(geometry))
+    builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="step-lookup")
+    rebuild = None
+    meter = worker_metrics(metrics, 'robot')
+    recorder = SessionRecorder(os.path.join(record, 'robot.rec')) if record else None
+    mark_ready(ready)
+    arm_steps = geometry.center_steps()
+    busy_until = 0.0
+    arrive = 0.0
+    moving = False
+    reported = None
+    next_report = time.monotonic() + STATS_INTERVAL
+    next_latency = time.monotonic() + LATENCY_INTERVAL
+
+    while stop_event is None or not stop_event.is_set():
+        now = time.monotonic()
+        if not len(scheduler):
+            timeout = IDLE_WAIT
+        elif now < busy_until:
+            timeout = busy_until - now
+            if moving:
+                timeout = min(timeout, arduino.feedback_interval)
+        else:
+            timeout = RETRY_WAIT
+        if subscription.wait(timeout):
+            records = subscription.read()
+            now = time.monotonic()
+            records['t_receive'] = now
+            if latency is not None:
+                latency.record('channel', now - records['t_publish'])
+            scheduler.add(records, now)
+            meter.add('picks_received', len(records))
+
+        if connecting:
+            if arduino.connected.is_set():
+                print(f"Robot connected on {port} ({protocol}) successfully!")
+                connecting = False
+            elif arduino.error is not None:
+                print(f"WARNING: Robot board not found ({arduino.error}).")
+                arduino = None
+                connecting = False
+        elif arduino and arduino.error is not None:
+            print(f"WARNING: Robot link lost ({arduino.error}), continuing without the board.")
+            arduino.close()
+            arduino = None
+            moving = False
+
+        if moving and arduino.arrived_at is not None:
+            busy_until = max(arduino.arrived_at, arrive) + scheduler.pick_time
+            moving = False
+
+        now = time.monotonic()
+        meter.set('queue_depth', len(scheduler))
+        meter.set('overrun', subscription.dropped)
+        meter.set('missed', scheduler.dropped)
+        meter.set('ik_rejects', scheduler.unreachable)
+        if arduino:
+            link = arduino.counters()
+            for key in ('in_flight', 'acked', 'naks', 'lost'):
+                meter.set(key, link[key])
+            meter.set('crc_errors', link['crc'])
+        meter.tick(now)
+        if now >= next_report:
+            stats = dict(scheduler.mailbox.counters(), overrun=subscription.dropped, missed=scheduler.dropped)
+            stats.pop('depth')
+            if arduino:
+                stats.update(arduino.counters())
+                stats.pop('in_flight')
+            if stats != reported:
+                print("Robot: " + " ".join(f"{k}={v}" for k, v in stats.items()))
+                reported = stats
+            next_report = now + STATS_INTERVAL
+        if latency is not None and now >= next_latency:
+            print("Robot latency:\n" + latency.report())
+            next_latency = now + LATENCY_INTERVAL
+
+        values = params.poll() if params is not None else None
+        if values is not None:
+            updated = Geometry(**{key: values[key] for key in GEOMETRY_PARAMS})
+            if updated != geometry:
+                geometry = updated
+                rebuild = builder.submit(StepLookup.load, geometry)
+        if rebuild is not None and rebuild.done():
+            scheduler.lookup = rebuild.result()
+            rebuild = None
+            print(f"Robot: geometry updated (version {params.last_version})")
+
+        if len(scheduler) and now >= busy_until and not connecting:
+            belt_running = conveyor_running is None or conveyor_running.is_set()
+            belt_speed = conveyor_speed.value if conveyor_speed is not None else 0
+            if arduino:
+                arm_steps = arduino.arm_steps(arm_steps)
+            planned = scheduler.next_target(now, arm_steps, belt_running, belt_speed)
+            if latency is not None:
+                latency.record('plan', time.monotonic() - now)
+            if planned is not None:
+                det, step1, step2, arrive, (intercept_x, intercept_y) = planned
+                if latency is not None:
+                    latency.record('mailbox', now - det['t_receive'])
+                label = f"[{color_name(int(det['color']))} {shape_name(int(det['shape']))}]"
+                target_x, target_y = pixel_to_table(intercept_x, intercept_y, scheduler.lookup.geometry)
+                print(f"{label} #{int(det['track_id'])} Intercept: {target_x:.1f}x{target_y:.1f} mm "
+                      f"in {(arrive - now) * 1000:.0f} ms -> Sending: M1:{step1},M2:{step2}")
+
+                arm_steps = (step1, step2)
+                busy_until = arrive + scheduler.pick_time
+                meter.add('commands')
+                if recorder is not None:
+                    recorder.record(KIND_COMMAND, np.atleast_1d(det), now, step1, step2)
+                if arduino:
+                    arduino.move(step1, step2, origin=float(det['timestamp']))
+                    moving = arduino.has_feedback()
+                    if moving:
+                        busy_until += MOVE_TIMEOUT
+
+    builder.shutdown(wait=False, cancel_futures=True)
+    if arduino:
+        arduino.close()
+    if simulator is not None:
+        simulator.close()
+    if recorder is not None:
+        recorder.close()
+    print("Robot module stopped.")
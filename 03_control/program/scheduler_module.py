@@ -0,0 +1,125 @@
+import numpy as np
+
+from mailbox_module import TargetMailbox
+from kinematics_module import DETECTION_W, DETECTION_H, UNREACHABLE
+from protocol_module import ACCEL_UNIT
+
+SERVO_SPEED = 2000.0
+SERVO_ACCEL = 50
+PICK_TIME = 0.3
+PIPELINE_LATENCY = 0.05
+BELT_PX_PER_UNIT = 60.0
+
+
+class PickScheduler:
+    def __init__(self, lookup, servo_speed=SERVO_SPEED, servo_accel=SERVO_ACCEL * ACCEL_UNIT, pick_time=PICK_TIME,
+                 latency=PIPELINE_LATENCY, horizon=5.0, step=0.05, belt_px_per_unit=BELT_PX_PER_UNIT,
+                 mailbox=None):
+        self.lookup = lookup
+        self.mailbox = TargetMailbox() if mailbox is None else mailbox
+        self.servo_speed = servo_speed
+        self.servo_accel = servo_accel
+        self.pick_time = pick_time
+        self.latency = latency
+        self.horizon = np.arange(0.0, horizon, step)
+        self.step = step
+        self.belt_px_per_unit = belt_px_per_unit
+        self.dropped = 0
+        self.unreachable = 0
+        self.scheduled = 0
+
+    def __len__(self):
+        return len(self.mailbox)
+
+    @property
+    def pending(self):
+        return self.mailbox.entries
+
+    def add(self, picks, now):
+        self.mailbox.put(picks, now)
+
+    def velocities(self, belt_running=True, belt_speed=0):
+        v = np.column_stack([self.pending['vx'], self.pending['vy']]).astype(float)
+        if not belt_running:
+            return np.zeros_like(v)
+        unknown = ~v.any(axis=1)
+        v[unknown, 0] = belt_speed * self.belt_px_per_unit
+        return v
+
+    def positions(self, v, when):
+        dt = when - self.pending['timestamp']
+        x = self.pending['cx'] + v[:, 0] * dt
+        y = self.pending['cy'] + v[:, 1] * dt
+        return x, y
+
+    def reachable(self, x, y):
+        inside = (x >= 0) & (x < DETECTION_W) & (y >= 0) & (y < DETECTION_H)
+        step1, _ = self.lookup.lookup_array(x, y)
+        return inside & (step1 != UNREACHABLE)
+
+    def windows(self, v, now):
+        dt = (now + self.horizon)[None, :] - self.pending['timestamp'][:, None]
+        x = self.pending['cx'][:, None] + v[:, 0:1] * dt
+        y = self.pending['cy'][:, None] + v[:, 1:2] * dt
+        ok = self.reachable(x, y)
+        any_ok = ok.any(axis=1)
+        first_ok = np.argmax(ok, axis=1)
+        last_ok = len(self.horizon) - 1 - np.argmax(ok[:, ::-1], axis=1)
+        earliest = np.where(any_ok, now + self.horizon[first_ok], np.inf)
+        deadline = np.where(any_ok, now + self.horizon[last_ok] + self.step, -np.inf)
+        in_view = (x[:, -1] >= 0) & (x[:, -1] < DETECTION_W) & (y[:, -1] >= 0) & (y[:, -1] < DETECTION_H)
+        upstream = ~any_ok & v.any(axis=1) & in_view
+        return earliest, deadline, upstream
+
+    def travel_time(self, distance):
+        ramp = self.servo_speed / self.servo_accel
+        cruise = distance >= self.servo_speed * ramp
+        return np.where(cruise, distance / self.servo_speed + ramp, 2.0 * np.sqrt(distance / self.servo_accel))
+
+    def intercept(self, v, now, arm_steps, earliest):
+        start = np.where(np.isfinite(earliest), earliest, now)
+        arrive = np.maximum(now + self.latency, start)
+        for _ in range(3):
+            x, y = self.positions(v, arrive)
+            step1, step2 = self.lookup.lookup_array(x, y)
+            travel = np.maximum(self.travel_time(np.abs(step1.astype(float) - arm_steps[0])),
+                                self.travel_time(np.abs(step2.astype(float) - arm_steps[1])))
+            arrive = np.maximum(now + self.latency + travel, start)
+        x, y = self.positions(v, arrive)
+        step1, step2 = self.lookup.lookup_array(x, y)
+        ok = self.reachable(x, y)
+        return arrive, step1, step2, ok
+
+    def next_target(self, now, arm_steps=None, belt_running=True, belt_speed=0):
+        if arm_steps is None:
+            arm_steps = self.lookup.geometry.center_steps()
+        if len(self.pending) == 0:
+            return None
+        v = self.velocities(belt_running, belt_speed)
+        earliest, deadline, upstream = self.windows(v, now)
+        moving = v.any(axis=1)
+        fresh = self.mailbox.expire(now, np.where(moving, np.where(upstream, np.inf, deadline), -np.inf))
+        if not fresh.all():
+            v, earliest, deadline, upstream = v[fresh], earliest[fresh], deadline[fresh], upstream[fresh]
+        if len(self.pending) == 0:
+            return None
+        arrive, step1, step2, ok = self.intercept(v, now, arm_steps, earliest)
+
+        expired = (arrive + self.pick_time > deadline) & ~upstream
+        feasible = ok & ~expired
+        self.dropped += int(np.count_nonzero(expired))
+        self.unreachable += int(np.count_nonzero(expired & np.isneginf(deadline)))
+        if not feasible.any():
+            self.mailbox.remove(expired)
+            return None
+
+        candidates = np.flatnonzero(feasible)
+        best = candidates[np.lexsort((arrive[candidates], deadline[candidates]))[0]]
+        target = self.pending[best].copy()
+        dt = arrive[best] - target['timestamp']
+        point = (float(target['cx'] + v[best, 0] * dt), float(target['cy'] + v[best, 1] * dt))
+        done = expired.copy()
+        done[best] = True
+        self.mailbox.remove(done)
+        self.scheduled += 1
+        return target, int(step1[best]), int(step2[best]), float(arrive[best]), point
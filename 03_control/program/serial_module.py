@@ -0,0 +1,300 @@
+import time
+import queue
+import threading
+import serial
+
+from protocol_module import (FrameDecoder, encode_position, encode_speed, encode_accel,
+                             encode_feedback_request, encode_ascii_position,
+                             CMD_ACK, CMD_NAK, CMD_NAK_UNKNOWN, CMD_STATE)
+
+SERIAL_BAUD = 115200
+FEEDBACK_INTERVAL = 0.05
+ACK_TIMEOUT = 0.5
+MAX_RETRIES = 1
+SETTLE_TIME = 2.0
+ARRIVE_TOLERANCE = 8
+
+
+class ArmPose:
+    __slots__ = ('steps', 'speeds', 'loads', 'timestamp')
+
+    def __init__(self, steps, speeds, loads, timestamp):
+        self.steps = steps
+        self.speeds = speeds
+        self.loads = loads
+        self.timestamp = timestamp
+
+    def moving(self):
+        return any(self.speeds)
+
+
+class SerialClient:
+    def __init__(self, port, baud=SERIAL_BAUD, protocol='ascii', feedback_interval=FEEDBACK_INTERVAL,
+                 ack_timeout=ACK_TIMEOUT, max_retries=MAX_RETRIES, tolerance=ARRIVE_TOLERANCE, latency=None):
+        if protocol not in ('binary', 'ascii'):
+            raise ValueError(f"Unknown serial protocol: {protocol}")
+        self.port = port
+        self.baud = baud
+        self.binary = protocol == 'binary'
+        self.feedback_interval = feedback_interval
+        self.ack_timeout = ack_timeout
+        self.max_retries = max_retries
+        self.tolerance = tolerance
+        self.latency = latency
+        self.link = None
+        self.decoder = FrameDecoder()
+
+        self.lock = threading.Lock()
+        self.outbox = queue.Queue()
+        self.in_flight = {}
+        self.traced = {}
+        self.latest = {}
+        self.seq = 0
+        self.pose = None
+        self.target = None
+        self.target_time = 0.0
+        self.arrived_at = None
+        self.sent = 0
+        self.acked = 0
+        self.naks = 0
+        self.lost = 0
+        self.retries = 0
+        self.feedback = 0
+
+        self.connected = threading.Event()
+        self.error = None
+        self.running = False
+        self.threads = []
+
+    def start(self, settle=SETTLE_TIME):
+        self.running = True
+        connector = threading.Thread(target=self._connect, args=(settle,), name="serial-connect", daemon=True)
+        self.threads = [connector]
+        connector.start()
+        return self
+
+    def _connect(self, settle):
+        try:
+            self.link = serial.Serial(self.port, self.baud, timeout=0.05)
+        except Exception as e:
+            self.error = e
+            self.running = False
+            return
+        time.sleep(settle)
+        now = time.monotonic()
+        with self.lock:
+            for entry in self.in_flight.values():
+                entry[2] = now
+        workers = [threading.Thread(target=self._write_loop, name="serial-writer", daemon=True)]
+        if self.binary:
+            workers.append(threading.Thread(target=self._read_loop, name="serial-reader", daemon=True))
+        for thread in workers:
+            thread.start()
+        self.threads += workers
+        self.connected.set()
+
+    def close(self):
+        self.running = False
+        self.outbox.put(None)
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+        if self.link is not None:
+            self.link.close()
+
+    def _next_seq(self):
+        with self.lock:
+            seq = self.seq
+            self.seq = (self.seq + 1) & 0xFF
+            return seq
+
+    def _send(self, cmd, encode, *values, trace=None):
+        seq = self._next_seq()
+        frame = encode(seq, *values)
+        with self.lock:
+            self.in_flight[seq] = [cmd, frame, time.monotonic(), 0]
+            self.latest[cmd] = seq
+        if trace is not None:
+            self.traced[seq] = trace
+        self.outbox.put((seq, frame))
+        return seq
+
+    def move(self, step1, step2, origin=None):
+        now = time.monotonic()
+        with self.lock:
+            self.target = (step1, step2)
+            self.target_time = now
+            self.arrived_at = None
+        if not self.binary:
+            seq = self._next_seq()
+            self.traced[seq] = (now, origin)
+            self.outbox.put((seq, encode_ascii_position(step1, step2)))
+            return None
+        return self._send('position', encode_position, step1, step2, trace=(now, origin))
+
+    def set_speed(self, speed1, speed2):
+        if self.binary:
+            return self._send('speed', encode_speed, speed1, speed2)
+
+    def set_accel(self, acc1, acc2):
+        if self.binary:
+            return self._send('accel', encode_accel, acc1, acc2)
+
+    def has_feedback(self):
+        return self.pose is not None
+
+    def arm_steps(self, default):
+        pose = self.pose
+        if pose is not None:
+            return pose.steps
+        return self.target if self.target is not None else default
+
+    def counters(self):
+        with self.lock:
+            return {'sent': self.sent, 'acked': self.acked, 'naks': self.naks, 'lost': self.lost,
+                    'retries': self.retries, 'in_flight': len(self.in_flight),
+                    'feedback': self.feedback, 'crc': self.decoder.crc_errors}
+
+    def _write_loop(self):
+        next_poll = time.monotonic()
+        while self.running:
+            now = time.monotonic()
+            items = []
+            try:
+                item = self.outbox.get(timeout=max(0.0, next_poll - now) if self.binary else None)
+                if item is not None:
+                    items.append(item)
+                while True:
+                    item = self.outbox.get_nowait()
+                    if item is not None:
+                        items.append(item)
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            if self.binary:
+                items += self._expire(now)
+                if now >= next_poll:
+                    seq = self._next_seq()
+                    with self.lock:
+                        self.in_flight[seq] = ['feedback', None, now, self.max_retries]
+                    items.append((seq, encode_feedback_request(seq)))
+                    next_poll = now + self.feedback_interval
+            if items:
+                try:
+                    self.link.write(b''.join(frame for _, frame in items))
+                except serial.SerialException as e:
+                    self._fail('write', e)
+                    break
+                self._written([seq for seq, _ in items], time.monotonic())
+
+    def _fail(self, action, e):
+        if self.error is None:
+            print(f"WARNING: Serial {action} failed ({e}).")
+            self.error = e
+        self.running = False
+        self.connected.clear()
+
+    def _written(self, seqs, now):
+        with self.lock:
+            self.sent += len(seqs)
+            for seq in seqs:
+                entry = self.in_flight.get(seq)
+                if entry is not None:
+                    entry[2] = now
+        for seq in seqs:
+            traced = self.traced.pop(seq, None)
+            if traced is None or self.latency is None:
+                continue
+            queued, origin = traced
+            self.latency.record('serial', now - queued)
+            if origin is not None:
+                self.latency.record('end_to_end', now - origin)
+
+    def _expire(self, now):
+        resend = []
+        with self.lock:
+            for seq, entry in list(self.in_flight.items()):
+                if now - entry[2] < self.ack_timeout:
+                    continue
+                if entry[1] is not None and entry[3] < self.max_retries:
+                    entry[2] = now
+                    entry[3] += 1
+                    self.retries += 1
+                    resend.append((seq, entry[1]))
+                else:
+                    del self.in_flight[seq]
+                    self.lost += 1
+        return resend
+
+    def _read_loop(self):
+        while self.running:
+            try:
+                data = self.link.read(self.link.in_waiting or 1)
+            except serial.SerialException as e:
+                self._fail('read', e)
+                break
+            if not data:
+                continue
+            now = time.monotonic()
+            for frame in self.decoder.feed(data):
+                if frame.cmd == CMD_STATE:
+                    self._on_state(frame, now)
+                elif frame.cmd in (CMD_ACK, CMD_NAK):
+                    self._on_ack(frame)
+                elif frame.cmd == CMD_NAK_UNKNOWN:
+                    self._resync(now)
+
+    def _on_ack(self, frame):
+        seq, _ = frame.values()
+        with self.lock:
+            entry = self.in_flight.get(seq)
+            if frame.cmd == CMD_ACK:
+                if entry is not None:
+                    del self.in_flight[seq]
+                    if entry[0] == 'position' and self.latency is not None:
+                        self.latency.record('ack', time.monotonic() - entry[2])
+                self.acked += 1
+                return
+            self.naks += 1
+            if entry is None or entry[1] is None:
+                return
+            if entry[3] >= self.max_retries:
+                del self.in_flight[seq]
+                self.lost += 1
+                return
+            entry[2] = time.monotonic()
+            entry[3] += 1
+            self.retries += 1
+        self.outbox.put((seq, entry[1]))
+
+    def _resync(self, now):
+        resend = []
+        with self.lock:
+            self.naks += 1
+            for seq, entry in list(self.in_flight.items()):
+                if entry[1] is None:
+                    continue
+                if self.latest.get(entry[0]) != seq:
+                    del self.in_flight[seq]
+                elif entry[3] >= self.max_retries:
+                    del self.in_flight[seq]
+                    self.lost += 1
+                else:
+                    entry[2] = now
+                    entry[3] += 1
+                    self.retries += 1
+                    resend.append((seq, entry[1]))
+        for item in resend:
+            self.outbox.put(item)
+
+    def _on_state(self, frame, now):
+        m1, m2 = frame.values()
+        pose = ArmPose((m1[0], m2[0]), (m1[1], m2[1]), (m1[2], m2[2]), now)
+        with self.lock:
+            self.in_flight.pop(frame.seq, None)
+            self.feedback += 1
+            self.pose = pose
+            if self.target is not None and self.arrived_at is None and not pose.moving():
+                if (abs(pose.steps[0] - self.target[0]) <= self.tolerance
+                        and abs(pose.steps[1] - self.target[1]) <= self.tolerance):
+                    self.arrived_at = now
@@ -0,0 +1,121 @@
+import cv2
+import numpy as np
+
+from channel_module import SHAPE_CODES, make_detections
+
+HU_EPS = 1e-5
+
+
+def _template_contour(draw):
+    img = np.zeros((100, 100), dtype=np.uint8)
+    draw(img)
+    cnts, _ = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return cnts[0]
+
+
+def circle_template():
+    return _template_contour(lambda img: cv2.circle(img, (50, 50), 40, 255, -1))
+
+
+def square_template():
+    return _template_contour(lambda img: cv2.rectangle(img, (20, 20), (80, 80), 255, -1))
+
+
+def triangle_template():
+    pts = np.array([[50, 20], [20, 80], [80, 80]])
+    return _template_contour(lambda img: cv2.drawContours(img, [pts], 0, 255, -1))
+
+
+TEMPLATES = {
+    'Circle': circle_template,
+    'Square': square_template,
+    'Triangle': triangle_template,
+}
+
+
+def hu_signatures(hu):
+    # Same per-moment terms as cv2.matchShapes(..., CONTOURS_MATCH_I1):
+    # 1 / (sign(h) * log10|h|), ignored where |h| is below HU_EPS.
+    hu = np.atleast_2d(hu)
+    mag = np.abs(hu)
+    valid = mag > HU_EPS
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sig = 1.0 / (np.sign(hu) * np.log10(np.where(valid, mag, 1.0)))
+    sig[~valid] = 0.0
+    return sig, valid
+
+
+class ShapeClassifier:
+    def __init__(self, min_area=500, match_threshold=0.35, square_min_extent=0.65,
+                 overlap_solidity=0.85, overlap_min_area=4000):
+        self.min_area = min_area
+        self.match_threshold = match_threshold
+        self.square_min_extent = square_min_extent
+        self.overlap_solidity = overlap_solidity
+        self.overlap_min_area = overlap_min_area
+
+        self.codes = np.zeros(0, dtype=np.uint8)
+        self.signatures = np.zeros((0, 7))
+        self.valid = np.zeros((0, 7), dtype=bool)
+        for name, build in TEMPLATES.items():
+            self.add_template(name, build())
+
+    def add_template(self, name, contour):
+        hu = cv2.HuMoments(cv2.moments(contour)).ravel()
+        sig, valid = hu_signatures(hu)
+        self.codes = np.append(self.codes, np.uint8(SHAPE_CODES[name]))
+        self.signatures = np.vstack([self.signatures, sig])
+        self.valid = np.vstack([self.valid, valid])
+
+    def measure(self, contours):
+        n = len(contours)
+        moments = np.zeros((n, 3))
+        hu = np.zeros((n, 7))
+        bbox_area = np.zeros(n)
+        hull_area = np.zeros(n)
+        for i, cnt in enumerate(contours):
+            M = cv2.moments(cnt)
+            moments[i] = M['m00'], M['m10'], M['m01']
+            if M['m00'] < self.min_area:
+                continue
+            hu[i] = cv2.HuMoments(M).ravel()
+            _, _, w_b, h_b = cv2.boundingRect(cnt)
+            bbox_area[i] = w_b * h_b
+            hull_area[i] = cv2.contourArea(cv2.convexHull(cnt))
+        return moments, hu, bbox_area, hull_area
+
+    def scores(self, hu):
+        sig, valid = hu_signatures(hu)
+        both = valid[:, None, :] & self.valid[None, :, :]
+        diff = np.abs(sig[:, None, :] - self.signatures[None, :, :])
+        return np.where(both, diff, 0.0).sum(axis=2)
+
+    def classify(self, contours):
+        moments, hu, bbox_area, hull_area = self.measure(contours)
+        area = moments[:, 0]
+        keep = np.flatnonzero(area >= self.min_area)
+        area = area[keep]
+        moments, hu = moments[keep], hu[keep]
+        bbox_area, hull_area = bbox_area[keep], hull_area[keep]
+
+        extent = area / np.maximum(bbox_area, 1.0)
+        solidity = np.divide(area, hull_area, out=np.zeros_like(area), where=hull_area > 0)
+
+        scores = self.scores(hu)
+        best = np.argmin(scores, axis=1)
+        best_score = scores[np.arange(len(keep)), best]
+        best_code = self.codes[best]
+
+        shape = np.where(best_score > self.match_threshold, SHAPE_CODES['Unknown'], best_code)
+        square_as_triangle = (best_code == SHAPE_CODES['Square']) & (extent < self.square_min_extent)
+        shape = np.where(square_as_triangle, SHAPE_CODES['Triangle'], shape)
+        overlap = (solidity < self.overlap_solidity) & (area > self.overlap_min_area)
+        shape = np.where(overlap, SHAPE_CODES['Overlap'], shape)
+
+        detections = make_detections(len(keep))
+        detections['shape'] = shape
+        detections['area'] = area
+        detections['cx'] = moments[:, 1] / area
+        detections['cy'] = moments[:, 2] / area
+        detections['confidence'] = np.clip(1.0 - best_score, 0.0, 1.0)
+        return detections, keep
@@ -0,0 +1,135 @@
+import os
+import time
+import unittest
+
+from firmware_sim import FirmwareStandIn
+from protocol_module import encode_ack, CMD_POSITION, STATUS_BAD_COMMAND, POSITION
+from serial_module import SerialClient
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class NakFirstPosition(FirmwareStandIn):
+    def __init__(self):
+        super().__init__()
+        self.rejected = 0
+
+    def handle(self, frame):
+        if frame.cmd == CMD_POSITION and not self.rejected:
+            self.rejected += 1
+            return encode_ack(frame.seq, STATUS_BAD_COMMAND, nak=True)
+        return super().handle(frame)
+
+
+class CorruptPosition(FirmwareStandIn):
+    def __init__(self, steps):
+        super().__init__()
+        self.payload = POSITION.pack(*steps)
+        self.corrupted = 0
+
+    def _receive(self, data):
+        at = data.find(self.payload)
+        if at >= 0 and not self.corrupted:
+            self.corrupted += 1
+            data = data[:at] + bytes([data[at] ^ 0xFF]) + data[at + 1:]
+        return super()._receive(data)
+
+
+class IgnorePosition(FirmwareStandIn):
+    def handle(self, frame):
+        if frame.cmd == CMD_POSITION:
+            return b''
+        return super().handle(frame)
+
+
+class Unpluggable(FirmwareStandIn):
+    def unplug(self):
+        self.running = False
+        self.thread.join(timeout=1.0)
+        os.close(self.master)
+        self.master = None
+
+    def close(self):
+        if self.master is not None:
+            super().close()
+        else:
+            os.close(self.slave)
+
+
+class SerialClientTest(unittest.TestCase):
+    def start(self, firmware, protocol='binary', **options):
+        self.firmware = firmware.start()
+        self.client = SerialClient(firmware.port, protocol=protocol, **options).start(settle=0.0)
+        self.assertTrue(self.client.connected.wait(2.0))
+        return self.client
+
+    def tearDown(self):
+        self.client.close()
+        self.firmware.close()
+
+    def test_move_is_acked(self):
+        client = self.start(FirmwareStandIn())
+        client.move(2000, 2100)
+        self.assertTrue(wait_for(lambda: self.firmware.positions == [2000, 2100]))
+        self.assertTrue(wait_for(lambda: client.counters()['in_flight'] == 0))
+        counters = client.counters()
+        self.assertGreaterEqual(counters['acked'], 1)
+        self.assertEqual((counters['naks'], counters['retries'], counters['lost']), (0, 0, 0))
+
+    def test_feedback_reports_arrival(self):
+        client = self.start(FirmwareStandIn())
+        client.move(1500, 2500)
+        self.assertTrue(wait_for(lambda: client.arrived_at is not None))
+        self.assertEqual(client.arm_steps(None), (1500, 2500))
+
+    def test_nak_triggers_retransmit(self):
+        client = self.start(NakFirstPosition())
+        client.move(1800, 1900)
+        self.assertTrue(wait_for(lambda: self.firmware.positions == [1800, 1900]))
+        self.assertTrue(wait_for(lambda: client.counters()['in_flight'] == 0))
+        counters = client.counters()
+        self.assertEqual((counters['naks'], counters['retries'], counters['lost']), (1, 1, 0))
+
+    def test_crc_error_resends_outstanding_command(self):
+        client = self.start(CorruptPosition((1800, 1900)), ack_timeout=5.0)
+        client.set_speed(500, 500)
+        self.assertTrue(wait_for(lambda: self.firmware.speed_limits == [500, 500]))
+        client.move(1800, 1900)
+        self.assertTrue(wait_for(lambda: self.firmware.positions == [1800, 1900]))
+        self.assertTrue(wait_for(lambda: client.counters()['in_flight'] == 0))
+        counters = client.counters()
+        self.assertEqual(self.firmware.decoder.crc_errors, 1)
+        self.assertEqual((counters['naks'], counters['retries'], counters['lost']), (1, 1, 0))
+        self.assertEqual(self.firmware.speed_limits, [500, 500])
+
+    def test_missing_ack_is_retried_then_lost(self):
+        client = self.start(IgnorePosition(), ack_timeout=0.1, max_retries=1)
+        client.move(1800, 1900)
+        self.assertTrue(wait_for(lambda: client.counters()['lost'] == 1))
+        self.assertEqual(client.counters()['retries'], 1)
+        self.assertNotEqual(self.firmware.positions, [1800, 1900])
+
+    def test_link_failure_is_reported(self):
+        client = self.start(Unpluggable())
+        self.firmware.unplug()
+        client.move(1800, 1900)
+        self.assertTrue(wait_for(lambda: client.error is not None))
+        self.assertFalse(client.connected.is_set())
+        self.assertFalse(client.running)
+
+    def test_ascii_lines(self):
+        client = self.start(FirmwareStandIn('ascii'), protocol='ascii')
+        client.move(2222, 2333)
+        self.assertTrue(wait_for(lambda: self.firmware.positions == [2222, 2333]))
+        self.assertEqual(self.firmware.commands, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import numpy as np
+
+from channel_module import make_detections
+from logger_module import BatchWriter, DetectionLogger, read_segment
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def detections(count, frame_id=0):
+    det = make_detections(count)
+    det['frame_id'] = frame_id
+    det['timestamp'] = time.monotonic()
+    return det
+
+
+class FailingWriter(BatchWriter):
+    def __init__(self, failures):
+        super().__init__("failing-writer", flush_interval=0.02)
+        self.failures = failures
+        self.batches = []
+        self.thread.start()
+
+    def _write(self, records):
+        if self.failures:
+            self.failures -= 1
+            raise OSError(28, "No space left on device")
+        self.batches.append(records)
+        self.written += len(records)
+
+
+class StuckWriter(BatchWriter):
+    def __init__(self):
+        super().__init__("stuck-writer", queue_size=1, flush_interval=0.01)
+        self.release = threading.Event()
+        self.thread.start()
+
+    def _write(self, records):
+        self.release.wait()
+
+
+class BatchWriterTest(unittest.TestCase):
+    def test_write_error_drops_batch_and_keeps_running(self):
+        writer = FailingWriter(failures=1)
+        writer.submit(np.arange(3))
+        self.assertTrue(wait_for(lambda: writer.dropped == 3))
+        writer.submit(np.arange(2))
+        self.assertTrue(wait_for(lambda: writer.written == 2))
+        writer.close()
+        self.assertFalse(writer.thread.is_alive())
+        self.assertFalse(writer.failed)
+
+    def test_close_does_not_hang_on_a_stuck_writer(self):
+        writer = StuckWriter()
+        for _ in range(5):
+            writer.submit(np.arange(1))
+        start = time.monotonic()
+        writer.close(timeout=0.2)
+        self.assertLess(time.monotonic() - start, 1.0)
+        writer.release.set()
+        writer.thread.join(timeout=2.0)
+
+
+class DetectionLoggerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, 'logs')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_binary_round_trip(self):
+        logger = DetectionLogger(self.directory, 'bin', flush_interval=0.02)
+        logger.log(detections(4, frame_id=7))
+        logger.close()
+        (segment,) = os.listdir(self.directory)
+        records = read_segment(os.path.join(self.directory, segment))
+        self.assertEqual(list(records['frame_id']), [7] * 4)
+
+    def test_rotation_recreates_a_removed_directory(self):
+        logger = DetectionLogger(self.directory, 'bin', segment_rows=2, flush_interval=0.02)
+        logger.log(detections(2))
+        self.assertTrue(wait_for(lambda: logger.written == 2))
+        shutil.rmtree(self.directory)
+        logger.log(detections(2))
+        self.assertTrue(wait_for(lambda: logger.written == 4))
+        logger.close()
+        self.assertEqual(logger.dropped, 0)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+
+from channel_module import make_detections
+from mailbox_module import TargetMailbox
+
+
+def records(track_ids, timestamps=None):
+    det = make_detections(len(track_ids))
+    det['track_id'] = track_ids
+    det['timestamp'] = 0.0 if timestamps is None else timestamps
+    det['frame_id'] = np.arange(len(track_ids))
+    return det
+
+
+class TargetMailboxTest(unittest.TestCase):
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            TargetMailbox(policy='newest')
+
+    def test_stale_records_are_rejected_on_put(self):
+        mailbox = TargetMailbox(max_age=2.0)
+        mailbox.put(records([1, 2], [0.0, 2.5]), 3.0)
+        self.assertEqual(list(mailbox.entries['track_id']), [2])
+        self.assertEqual((mailbox.accepted, mailbox.stale), (1, 1))
+
+    def test_latest_keeps_one_entry(self):
+        mailbox = TargetMailbox(policy='latest')
+        mailbox.put(records([1, 2, 3]), 0.0)
+        self.assertEqual(list(mailbox.entries['track_id']), [3])
+        self.assertEqual(mailbox.dropped, 2)
+
+    def test_latest_per_track_coalesces(self):
+        mailbox = TargetMailbox(policy='latest_per_track')
+        mailbox.put(records([1, 2, 1]), 0.0)
+        mailbox.put(records([2, 0, 0]), 0.0)
+        self.assertEqual(sorted(mailbox.entries['track_id']), [0, 0, 1, 2])
+        self.assertEqual(int(mailbox.entries[mailbox.entries['track_id'] == 1]['frame_id'][0]), 2)
+        self.assertEqual(mailbox.coalesced, 2)
+
+    def test_drop_oldest_keeps_the_newest(self):
+        mailbox = TargetMailbox(capacity=2, policy='drop_oldest')
+        mailbox.put(records([1, 2, 3], [0.1, 0.3, 0.2]), 0.5)
+        self.assertEqual(sorted(mailbox.entries['track_id']), [2, 3])
+        self.assertEqual(mailbox.dropped, 1)
+
+    def test_expire_by_age(self):
+        mailbox = TargetMailbox(max_age=2.0)
+        mailbox.put(records([1, 2], [0.0, 1.0]), 1.0)
+        fresh = mailbox.expire(2.5)
+        self.assertEqual(list(fresh), [False, True])
+        self.assertEqual(list(mailbox.entries['track_id']), [2])
+        self.assertEqual(mailbox.stale, 1)
+
+    def test_expire_until_extends_the_age(self):
+        mailbox = TargetMailbox(max_age=2.0)
+        mailbox.put(records([1, 2, 3]), 0.0)
+        fresh = mailbox.expire(5.0, np.array([np.inf, 6.0, 4.0]))
+        self.assertEqual(list(fresh), [True, True, False])
+        self.assertEqual(list(mailbox.entries['track_id']), [1, 2])
+
+    def test_remove_and_counters(self):
+        mailbox = TargetMailbox()
+        mailbox.put(records([1, 2, 3]), 0.0)
+        mailbox.remove(mailbox.entries['track_id'] == 2)
+        self.assertEqual(mailbox.counters(),
+                         {'accepted': 3, 'dropped': 0, 'stale': 0, 'coalesced': 0, 'depth': 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
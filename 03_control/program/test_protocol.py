@@ -0,0 +1,95 @@
+import unittest
+
+from protocol_module import (FrameDecoder, crc16, encode_frame, encode_position, encode_ack, encode_state,
+                             encode_nak_unknown, encode_ascii_position, CMD_POSITION, CMD_ACK, CMD_NAK,
+                             CMD_NAK_UNKNOWN, CMD_STATE, STATUS_BAD_CRC, SYNC)
+
+
+class Crc16Test(unittest.TestCase):
+    def test_check_value(self):
+        self.assertEqual(crc16(b'123456789'), 0x29B1)
+
+    def test_empty_input_is_initial_value(self):
+        self.assertEqual(crc16(b''), 0xFFFF)
+
+    def test_incremental(self):
+        self.assertEqual(crc16(b'56789', crc16(b'1234')), crc16(b'123456789'))
+
+
+class EncodeDecodeTest(unittest.TestCase):
+    def test_position_round_trip(self):
+        frames = FrameDecoder().feed(encode_position(7, 2524, 2048))
+        self.assertEqual(len(frames), 1)
+        self.assertEqual((frames[0].seq, frames[0].cmd), (7, CMD_POSITION))
+        self.assertEqual(frames[0].values(), (2524, 2048))
+
+    def test_position_frame_size(self):
+        self.assertEqual(len(encode_position(0, 1, 2)), 11)
+
+    def test_ack_and_nak(self):
+        ack, nak = FrameDecoder().feed(encode_ack(3) + encode_ack(4, STATUS_BAD_CRC, nak=True))
+        self.assertEqual((ack.cmd, ack.values()), (CMD_ACK, (3, 0)))
+        self.assertEqual((nak.cmd, nak.values()), (CMD_NAK, (4, STATUS_BAD_CRC)))
+
+    def test_nak_unknown_carries_no_seq(self):
+        (frame,) = FrameDecoder().feed(encode_nak_unknown(0))
+        self.assertEqual((frame.cmd, frame.values()), (CMD_NAK_UNKNOWN, (STATUS_BAD_CRC,)))
+
+    def test_state_round_trip(self):
+        (frame,) = FrameDecoder().feed(encode_state(9, (100, -5, 3), (200, 7, -1)))
+        self.assertEqual(frame.cmd, CMD_STATE)
+        self.assertEqual(frame.values(), ((100, -5, 3), (200, 7, -1)))
+
+    def test_seq_wraps(self):
+        (frame,) = FrameDecoder().feed(encode_position(256 + 5, 1, 2))
+        self.assertEqual(frame.seq, 5)
+
+    def test_payload_limit(self):
+        with self.assertRaises(ValueError):
+            encode_frame(0, CMD_POSITION, bytes(256))
+
+    def test_ascii_line(self):
+        self.assertEqual(encode_ascii_position(12, 34), b"M1:12,M2:34\n")
+
+
+class ResyncTest(unittest.TestCase):
+    def test_byte_at_a_time(self):
+        decoder = FrameDecoder()
+        frames = []
+        for byte in encode_position(1, 10, 20) + encode_position(2, 30, 40):
+            frames += decoder.feed(bytes([byte]))
+        self.assertEqual([f.values() for f in frames], [(10, 20), (30, 40)])
+
+    def test_leading_garbage(self):
+        decoder = FrameDecoder()
+        frames = decoder.feed(b'\x00\xff\xa5garbage' + encode_position(1, 10, 20))
+        self.assertEqual([f.values() for f in frames], [(10, 20)])
+        self.assertGreater(decoder.skipped, 0)
+
+    def test_corrupt_frame_is_dropped(self):
+        decoder = FrameDecoder()
+        bad = bytearray(encode_position(1, 10, 20))
+        bad[-3] ^= 0x01
+        frames = decoder.feed(bytes(bad) + encode_position(2, 30, 40))
+        self.assertEqual([(f.seq, f.values()) for f in frames], [(2, (30, 40))])
+        self.assertEqual(decoder.crc_errors, 1)
+
+    def test_truncated_frame_then_good_frame(self):
+        decoder = FrameDecoder()
+        frames = decoder.feed(encode_position(1, 10, 20)[:6] + encode_position(2, 30, 40))
+        self.assertEqual([f.seq for f in frames], [2])
+
+    def test_sync_bytes_inside_payload(self):
+        step = int.from_bytes(SYNC, 'little')
+        (frame,) = FrameDecoder().feed(b'\x5a' + encode_position(1, step, step))
+        self.assertEqual(frame.values(), (step, step))
+
+    def test_partial_sync_kept_between_feeds(self):
+        decoder = FrameDecoder()
+        frame = encode_position(1, 10, 20)
+        self.assertEqual(decoder.feed(b'noise' + frame[:1]), [])
+        self.assertEqual(len(decoder.feed(frame[1:])), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from channel_module import make_detections
+from recorder_module import SessionRecorder, load_session, HEADER, RECORD_DTYPE, KIND_PICK
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def picks(frame_id):
+    det = make_detections(1)
+    det['frame_id'] = frame_id
+    return det
+
+
+class SessionRecorderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.session = os.path.join(self.tmp.name, 'session')
+        os.makedirs(self.session)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_segments_are_capped_and_pruned(self):
+        recorder = SessionRecorder(os.path.join(self.session, 'vision.rec'), flush_interval=0.02,
+                                   max_bytes=len(HEADER) + 10 * RECORD_DTYPE.itemsize, max_segments=3)
+        for i in range(45):
+            recorder.record(KIND_PICK, picks(i), float(i))
+        recorder.close()
+        self.assertEqual(sorted(os.listdir(self.session)), ['vision_002.rec', 'vision_003.rec', 'vision_004.rec'])
+        records = load_session(self.session)
+        self.assertEqual(list(records['detection']['frame_id']), list(range(20, 45)))
+
+    def test_recording_resumes_after_the_directory_is_removed(self):
+        recorder = SessionRecorder(os.path.join(self.session, 'robot.rec'), flush_interval=0.02,
+                                   max_bytes=len(HEADER) + RECORD_DTYPE.itemsize)
+        recorder.record(KIND_PICK, picks(1), 1.0)
+        self.assertTrue(wait_for(lambda: recorder.written == 1))
+        shutil.rmtree(self.session)
+        recorder.record(KIND_PICK, picks(2), 2.0)
+        self.assertTrue(wait_for(lambda: recorder.written == 2))
+        recorder.close()
+        self.assertEqual(list(load_session(self.session)['detection']['frame_id']), [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
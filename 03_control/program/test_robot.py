@@ -0,0 +1,76 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from broker_module import DetectionBroker
+from channel_module import make_detections
+from params_module import ParamBlock, PARAMETERS
+from recorder_module import load_session, KIND_COMMAND
+from robot_module import run_robot, SIM_PORT
+from scheduler_module import PICK_TIME
+
+# offset_y=290 leaves y=160 reachable only for x in 550..930, so a pick at x=250
+# moving at 300 px/s can only be served about one second from now.
+UPSTREAM_X = 250.0
+REACH_X = 550.0
+BELT_VX = 300.0
+
+
+def pick(track_id, cx, cy, vx):
+    det = make_detections(1)
+    det['track_id'] = track_id
+    det['cx'] = cx
+    det['cy'] = cy
+    det['vx'] = vx
+    det['timestamp'] = time.monotonic()
+    return det
+
+
+class RobotLoopTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        self.params = ParamBlock('test_robot_params', create=True, values=dict(PARAMETERS, offset_y=290.0))
+        self.broker = DetectionBroker()
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=run_robot,
+                                       args=(self.broker.subscribe('robot'), None, None, self.stop, SIM_PORT,
+                                             'binary'),
+                                       kwargs={'params': self.params, 'record': self.tmp.name})
+        self.thread.start()
+        time.sleep(0.5)
+
+    def tearDown(self):
+        self.stop.set()
+        self.thread.join(timeout=5.0)
+        self.broker.close()
+        self.broker.unlink()
+        self.params.close()
+        self.params.unlink()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def commands(self):
+        self.stop.set()
+        self.thread.join(timeout=5.0)
+        records = load_session(self.tmp.name)
+        return records[records['kind'] == KIND_COMMAND]
+
+    def test_waits_for_upstream_pick_before_next_target(self):
+        upstream = pick(1, UPSTREAM_X, 160.0, BELT_VX)
+        self.broker.publish(upstream)
+        time.sleep(0.2)
+        self.broker.publish(pick(2, 700.0, 240.0, 0.0))
+        time.sleep(2.0)
+
+        commands = self.commands()
+        self.assertEqual(list(commands['detection']['track_id']), [1, 2])
+        entry = float(upstream['timestamp'][0]) + (REACH_X - UPSTREAM_X) / BELT_VX
+        self.assertGreaterEqual(commands['time'][1], entry + PICK_TIME)
+
+
+if __name__ == "__main__":
+    unittest.main()
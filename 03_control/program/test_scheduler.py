@@ -0,0 +1,104 @@
+import unittest
+import numpy as np
+
+from channel_module import make_detections
+from kinematics_module import StepLookup, DETECTION_W, DETECTION_H, UNREACHABLE
+from scheduler_module import PickScheduler, PIPELINE_LATENCY, SERVO_SPEED, SERVO_ACCEL
+from protocol_module import ACCEL_UNIT
+
+REACH = (700, 900)
+ARM = (2000, 2000)
+
+
+def reach_lookup():
+    steps = np.full((DETECTION_H, DETECTION_W), UNREACHABLE, dtype=np.int16)
+    steps[:, REACH[0]:REACH[1]] = ARM[0]
+    return StepLookup(steps, steps.copy())
+
+
+def picks(*objects):
+    det = make_detections(len(objects))
+    for i, (cx, vx) in enumerate(objects):
+        det[i]['track_id'] = i + 1
+        det[i]['cx'] = cx
+        det[i]['cy'] = 160
+        det[i]['vx'] = vx
+    return det
+
+
+class PickSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = PickScheduler(reach_lookup())
+
+    def test_upstream_object_is_met_at_the_reach_entry(self):
+        self.scheduler.add(picks((400, 100)), 0.0)
+        det, _, _, arrive, (x, _) = self.scheduler.next_target(0.0, ARM)
+        self.assertEqual(det['cx'], 400)
+        self.assertAlmostEqual(arrive, 3.0, delta=self.scheduler.step)
+        self.assertGreaterEqual(x, REACH[0])
+        self.assertLess(x, REACH[0] + 100 * self.scheduler.step)
+
+    def test_object_beyond_the_horizon_is_kept(self):
+        self.scheduler.add(picks((100, 50)), 0.0)
+        self.assertIsNone(self.scheduler.next_target(0.0, ARM))
+        self.assertEqual(len(self.scheduler), 1)
+        self.assertEqual((self.scheduler.dropped, self.scheduler.unreachable), (0, 0))
+
+    def test_kept_upstream_object_outlives_max_age(self):
+        self.scheduler.add(picks((100, 50)), 0.0)
+        self.assertIsNone(self.scheduler.next_target(2.5, ARM))
+        self.assertEqual(len(self.scheduler), 1)
+        det, _, _, arrive, _ = self.scheduler.next_target(8.0, ARM)
+        self.assertAlmostEqual(arrive, 12.0, delta=self.scheduler.step)
+
+    def test_object_past_the_reach_is_unreachable(self):
+        self.scheduler.add(picks((1000, 100)), 0.0)
+        self.assertIsNone(self.scheduler.next_target(0.0, ARM))
+        self.assertEqual(len(self.scheduler), 0)
+        self.assertEqual((self.scheduler.dropped, self.scheduler.unreachable), (1, 1))
+
+    def test_expired_deadline_is_dropped_but_not_unreachable(self):
+        self.scheduler.add(picks((895, 300)), 0.0)
+        self.assertIsNone(self.scheduler.next_target(0.0, ARM))
+        self.assertEqual(len(self.scheduler), 0)
+        self.assertEqual((self.scheduler.dropped, self.scheduler.unreachable), (1, 0))
+
+    def test_earliest_deadline_goes_first(self):
+        self.scheduler.add(picks((720, 100), (850, 100), (760, 100)), 0.0)
+        order = [int(self.scheduler.next_target(0.0, ARM)[0]['track_id']) for _ in range(3)]
+        self.assertEqual(order, [2, 3, 1])
+
+    def test_stationary_object_expires_by_age(self):
+        self.scheduler.add(picks((800, 0)), 0.0)
+        self.assertIsNone(self.scheduler.next_target(3.0, ARM, belt_running=False))
+        self.assertEqual(self.scheduler.mailbox.stale, 1)
+
+    def test_stopped_belt_plans_a_static_pick(self):
+        self.scheduler.add(picks((800, 100)), 0.0)
+        det, _, _, arrive, (x, _) = self.scheduler.next_target(0.5, ARM, belt_running=False)
+        self.assertAlmostEqual(arrive, 0.5 + PIPELINE_LATENCY)
+        self.assertEqual(x, 800)
+
+
+class TravelTimeTest(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = PickScheduler(reach_lookup())
+        self.accel = SERVO_ACCEL * ACCEL_UNIT
+
+    def test_short_move_is_triangular(self):
+        distance = 0.5 * SERVO_SPEED ** 2 / self.accel
+        self.assertAlmostEqual(float(self.scheduler.travel_time(distance)), 2 * np.sqrt(distance / self.accel))
+
+    def test_long_move_cruises(self):
+        distance = 3 * SERVO_SPEED ** 2 / self.accel
+        expected = distance / SERVO_SPEED + SERVO_SPEED / self.accel
+        self.assertAlmostEqual(float(self.scheduler.travel_time(distance)), expected)
+
+    def test_profiles_meet_at_full_speed(self):
+        distance = SERVO_SPEED ** 2 / self.accel
+        self.assertAlmostEqual(float(self.scheduler.travel_time(distance - 1e-6)),
+                               float(self.scheduler.travel_time(distance)), places=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import numpy as np
+
+from channel_module import SHAPE_NAMES, make_detections
+
+
+class CentroidTracker:
+    def __init__(self, max_distance=120.0, max_backtrack=30.0, direction=(1.0, 0.0),
+                 max_missed=5, min_hits=3, smoothing=0.5):
+        self.max_distance = max_distance
+        self.max_backtrack = max_backtrack
+        self.direction = np.asarray(direction, dtype=float) / np.hypot(*direction)
+        self.max_missed = max_missed
+        self.min_hits = min_hits
+        self.smoothing = smoothing
+        self.next_id = 1
+
+        self.ids = np.zeros(0, dtype=np.uint32)
+        self.pos = np.zeros((0, 2))
+        self.vel = np.zeros((0, 2))
+        self.last_time = np.zeros(0)
+        self.hits = np.zeros(0, dtype=int)
+        self.missed = np.zeros(0, dtype=int)
+        self.votes = np.zeros((0, len(SHAPE_NAMES)), dtype=int)
+        self.reported = np.zeros(0, dtype=bool)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def match(self, points, timestamp):
+        if len(self.ids) == 0 or len(points) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+        dt = np.maximum(timestamp - self.last_time, 0.0)
+        predicted = self.pos + self.vel * dt[:, None]
+        delta = points[None, :, :] - predicted[:, None, :]
+        cost = np.hypot(delta[..., 0], delta[..., 1])
+        along = delta @ self.direction
+        cost[(cost > self.max_distance) | (along < -self.max_backtrack)] = np.inf
+
+        track_idx, det_idx = [], []
+        used_tracks, used_dets = set(), set()
+        for flat in np.argsort(cost, axis=None):
+            t, d = divmod(int(flat), cost.shape[1])
+            if not np.isfinite(cost[t, d]):
+                break
+            if t in used_tracks or d in used_dets:
+                continue
+            used_tracks.add(t)
+            used_dets.add(d)
+            track_idx.append(t)
+            det_idx.append(d)
+        return np.array(track_idx, dtype=int), np.array(det_idx, dtype=int)
+
+    def update(self, detections):
+        if len(detections):
+            timestamp = float(detections['timestamp'].max())
+        elif len(self.ids):
+            timestamp = float(self.last_time.max())
+        else:
+            return make_detections(0)
+
+        points = np.column_stack([detections['cx'], detections['cy']]).astype(float)
+        track_idx, det_idx = self.match(points, timestamp)
+
+        if len(track_idx):
+            dt = timestamp - self.last_time[track_idx]
+            moved = (points[det_idx] - self.pos[track_idx]) / np.maximum(dt, 1e-3)[:, None]
+            first = self.hits[track_idx] == 1
+            alpha = np.where(first, 1.0, self.smoothing)[:, None]
+            self.vel[track_idx] = alpha * moved + (1.0 - alpha) * self.vel[track_idx]
+            self.pos[track_idx] = points[det_idx]
+            self.last_time[track_idx] = timestamp
+            self.hits[track_idx] += 1
+            self.missed[track_idx] = 0
+            self.votes[track_idx, detections['shape'][det_idx]] += 1
+
+        unmatched_tracks = np.ones(len(self.ids), dtype=bool)
+        unmatched_tracks[track_idx] = False
+        self.missed[unmatched_tracks] += 1
+
+        new = np.ones(len(detections), dtype=bool)
+        new[det_idx] = False
+        new_idx = np.flatnonzero(new)
+        n_new = len(new_idx)
+        new_ids = np.arange(self.next_id, self.next_id + n_new, dtype=np.uint32)
+        self.next_id += n_new
+        new_votes = np.zeros((n_new, len(SHAPE_NAMES)), dtype=int)
+        new_votes[np.arange(n_new), detections['shape'][new_idx]] = 1
+
+        self.ids = np.concatenate([self.ids, new_ids])
+        self.pos = np.vstack([self.pos, points[new_idx]])
+        self.vel = np.vstack([self.vel, np.zeros((n_new, 2))])
+        self.last_time = np.concatenate([self.last_time, np.full(n_new, timestamp)])
+        self.hits = np.concatenate([self.hits, np.ones(n_new, dtype=int)])
+        self.missed = np.concatenate([self.missed, np.zeros(n_new, dtype=int)])
+        self.votes = np.vstack([self.votes, new_votes])
+        self.reported = np.concatenate([self.reported, np.zeros(n_new, dtype=bool)])
+
+        detections['track_id'][det_idx] = self.ids[track_idx]
+        detections['track_id'][new_idx] = new_ids
+
+        ready = np.flatnonzero((self.hits >= self.min_hits) & ~self.reported & (self.missed == 0))
+        picks = self.picks(ready, detections)
+        self.reported[ready] = True
+
+        alive = self.missed <= self.max_missed
+        if not alive.all():
+            for name in ('ids', 'pos', 'vel', 'last_time', 'hits', 'missed', 'votes', 'reported'):
+                setattr(self, name, getattr(self, name)[alive])
+        return picks
+
+    def picks(self, ready, detections):
+        picks = make_detections(len(ready))
+        if len(ready) == 0:
+            return picks
+        rows = {int(tid): i for i, tid in enumerate(detections['track_id'])}
+        source = detections[[rows[int(tid)] for tid in self.ids[ready]]]
+        picks[:] = source
+        picks['shape'] = np.argmax(self.votes[ready], axis=1)
+        picks['confidence'] = self.votes[ready].max(axis=1) / self.hits[ready]
+        picks['vx'] = self.vel[ready, 0]
+        picks['vy'] = self.vel[ready, 1]
+        return picks
@@ -1,118 +1,146 @@
+import os
 import cv2
-import numpy as np
-import csv
 import time
-
-def get_templates():
-    temp_img = np.zeros((100, 100), dtype=np.uint8)
-
-    circle_img = temp_img.copy()
-    cv2.circle(circle_img, (50, 50), 40, 255, -1)
-    cnts, _ = cv2.findContours(circle_img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    t_circle = cnts[0]
-
-    square_img = temp_img.copy()
-    cv2.rectangle(square_img, (20, 20), (80, 80), 255, -1)
-    cnts, _ = cv2.findContours(square_img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    t_square = cnts[0]
-
-    tri_img = temp_img.copy()
-    pts = np.array([[50, 20], [20, 80], [80, 80]])
-    cv2.drawContours(tri_img, [pts], 0, 255, -1)
-    cnts, _ = cv2.findContours(tri_img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    t_triangle = cnts[0]
-
-    return t_circle, t_square, t_triangle
-
-
-def run_vision(coord_queue):
-    cap = cv2.VideoCapture(0)
-
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-
-    SCREEN_W, SCREEN_H = 1480, 320
-    template_circle, template_square, template_triangle = get_templates()
-
-    cv2.namedWindow("Jetson Ultimate Vision", cv2.WINDOW_NORMAL)
-    cv2.resizeWindow("Jetson Ultimate Vision", 1200, 300)
-
-    with open('log_coordinates.csv', mode='w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(['Timestamp', 'Shape', 'X_coord', 'Y_coord'])
-
-        while True:
-            ret, frame = cap.read()
-            if not ret: break
-
-            h, w, _ = frame.shape
-            roi_h = int(w * (SCREEN_H / SCREEN_W))
-            y1 = max(0, (h - roi_h) // 2)
-            y2 = min(h, y1 + roi_h)
-            roi = frame[y1:y2, 0:w]
-            roi_display = cv2.resize(roi, (1480, 320))
-
-            hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-
-            lower_green = np.array([35, 40, 20])
-            upper_green = np.array([90, 255, 255])
-            mask = cv2.inRange(hsv, lower_green, upper_green)
-
-            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3,3), np.uint8))
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-            for cnt in contours:
-                area = cv2.contourArea(cnt)
-                if area < 500: continue
-
-                match_circle = cv2.matchShapes(cnt, template_circle, 1, 0.0)
-                match_square = cv2.matchShapes(cnt, template_square, 1, 0.0)
-                match_triangle = cv2.matchShapes(cnt, template_triangle, 1, 0.0)
-
-                x_b, y_b, w_b, h_b = cv2.boundingRect(cnt)
-                extent = float(area) / (w_b * h_b)
-                hull = cv2.convexHull(cnt)
-                solidity = float(area) / cv2.contourArea(hull) if cv2.contourArea(hull) > 0 else 0
-
-                scores = {"Circle": match_circle, "Square": match_square, "Triangle": match_triangle}
-                best_match = min(scores, key=scores.get)
-
-                if solidity < 0.85 and area > 4000:
-                    shape = "Overlap"
-                elif best_match == "Square" and extent < 0.65:
-                    shape = "Triangle"
-                elif scores[best_match] > 0.35:
-                    shape = "Unknown"
-                else:
-                    shape = best_match
-
-                M = cv2.moments(cnt)
-                if M["m00"] != 0:
-                    cX = int(M["m10"] / M["m00"])
-                    cY = int(M["m01"] / M["m00"])
-
-                    log_entry = f"[{shape}] X:{cX} Y:{cY}"
-                    try:
-                        coord_queue.put_nowait(log_entry)
-                    except:
-                        pass
-
-                    scale_x, scale_y = 1480 / roi.shape[1], 320 / roi.shape[0]
-                    draw_x, draw_y = int(cX * scale_x), int(cY * scale_y)
-
-                    current_time = time.strftime("%H:%M:%S")
-                    writer.writerow([current_time, shape, cX, cY])
-
-                    color = (0, 0, 255) if shape in ["Overlap", "Unknown"] else (0, 255, 0)
-                    cv2.drawContours(roi_display, [(cnt * [scale_x, scale_y]).astype(int)], 0, color, 2)
-
-                    label = f"{shape} (X:{cX} Y:{cY})"
-                    cv2.putText(roi_display, label, (draw_x - 60, draw_y - 15),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
-                    cv2.circle(roi_display, (draw_x, draw_y), 3, (255, 255, 255), -1)
-
-            cv2.imshow("Jetson Ultimate Vision", roi_display)
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from shape_module import ShapeClassifier
+from blob_module import BlobExtractor
+from color_module import ColorSegmenter
+from preview_module import PREVIEW_WINDOW, render_overlay
+from capture_module import open_source, LatestFrameCapture
+from tracker_module import CentroidTracker
+from logger_module import DetectionLogger
+from color_module import build_lut_from_hsv
+from params_module import VISION_PARAMS, color_ranges, load_params
+from recorder_module import SessionRecorder, KIND_DETECTION, KIND_PICK
+from worker_module import mark_ready
+from metrics_module import worker_metrics
+from channel_module import SHAPE_NAMES
+
+SCREEN_W, SCREEN_H = 1480, 320
+SHAPE_METRICS = [f"det_{name.lower()}" for name in SHAPE_NAMES]
+
+
+def crop_roi(frame):
+    h, w, _ = frame.shape
+    roi_h = int(w * (SCREEN_H / SCREEN_W))
+    y1 = max(0, (h - roi_h) // 2)
+    y2 = min(h, y1 + roi_h)
+    return frame[y1:y2, 0:w]
+
+
+class VisionPipeline:
+    STAGES = ('segment', 'blobs', 'classify', 'track')
+
+    def __init__(self, min_area=500, segmenter=None, region=None):
+        self.segmenter = ColorSegmenter() if segmenter is None else segmenter
+        self.blobs = BlobExtractor(min_area=min_area, region=region)
+        self.classifier = ShapeClassifier(min_area=min_area)
+        self.tracker = CentroidTracker()
+        self.stage_times = dict.fromkeys(self.STAGES, 0.0)
+        self.colors = None
+
+    def configure(self, values):
+        self.blobs.min_area = values['min_area']
+        for key in VISION_PARAMS:
+            setattr(self.classifier, key, values[key])
+        ranges = color_ranges(values)
+        if ranges != self.colors:
+            self.segmenter.lut = build_lut_from_hsv(ranges, self.segmenter.bits)
+            self.colors = ranges
+
+    def process(self, frame, frame_id, capture_time):
+        t0 = time.perf_counter()
+        roi = crop_roi(frame)
+        colors, mask = self.segmenter.segment(roi)
+        t1 = time.perf_counter()
+        contours, stats, _, blob_colors = self.blobs.extract(mask, colors)
+        t2 = time.perf_counter()
+        detections, kept = self.classifier.classify(contours)
+        detections['color'] = blob_colors[kept]
+        detections['frame_id'] = frame_id
+        detections['timestamp'] = capture_time
+        t3 = time.perf_counter()
+        picks = self.tracker.update(detections)
+        t4 = time.perf_counter()
+
+        times = self.stage_times
+        times['segment'], times['blobs'], times['classify'], times['track'] = t1 - t0, t2 - t1, t3 - t2, t4 - t3
+        return roi, detections, picks, stats[kept, :4]
+
+
+def make_pipeline(values=None):
+    pipeline = VisionPipeline()
+    pipeline.configure(load_params() if values is None else values)
+    return pipeline
+
+
+def run_vision(broker, frame_buffer=None, headless=False, source=0, log_format='csv', latency=None,
+               ready=None, metrics=None, params=None, record=None, stop_event=None):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        camera = executor.submit(open_source, source, width=1280, height=720)
+        pipeline = make_pipeline(params.poll() if params is not None else None)
+        capture = LatestFrameCapture(camera.result()).start()
+
+    if not headless:
+        cv2.namedWindow(PREVIEW_WINDOW, cv2.WINDOW_NORMAL)
+        cv2.resizeWindow(PREVIEW_WINDOW, 1200, 300)
+
+    logger = DetectionLogger('logs', log_format)
+    meter = worker_metrics(metrics, 'vision')
+    recorder = SessionRecorder(os.path.join(record, 'vision.rec')) if record else None
+    mark_ready(ready)
+
+    reported_drops = 0
+    next_report = time.monotonic() + 5.0
+    while stop_event is None or not stop_event.is_set():
+        ret, frame, frame_id, capture_time = capture.read()
+        meter.tick()
+        if not ret:
+            if capture.running: continue
+            break
+
+        values = params.poll() if params is not None else None
+        if values is not None:
+            pipeline.configure(values)
+            print(f"Vision: parameters updated (version {params.last_version})")
+
+        if capture.dropped != reported_drops and capture_time >= next_report:
+            print(f"Vision: {capture.dropped - reported_drops} stale frames dropped ({capture.dropped} total)")
+            reported_drops = capture.dropped
+            next_report = capture_time + 5.0
+
+        roi, detections, picks, boxes = pipeline.process(frame, frame_id, capture_time)
+        detect_time = time.monotonic()
+        picks['t_detect'] = detect_time
+        if latency is not None:
+            latency.record('vision', detect_time - capture_time)
+
+        logger.log(detections)
+        broker.publish(picks)
+        if recorder is not None:
+            recorder.record(KIND_DETECTION, detections, detect_time)
+            recorder.record(KIND_PICK, picks, detect_time)
+
+        meter.add('frames')
+        meter.set('frame_drops', capture.dropped)
+        meter.add('detections', len(detections))
+        meter.add('picks', len(picks))
+        for key, count in zip(SHAPE_METRICS, np.bincount(detections['shape'], minlength=len(SHAPE_NAMES))):
+            meter.add(key, count)
+        meter.set('log_queue', logger.queue.qsize())
+        meter.set('log_dropped', logger.dropped)
+
+        if frame_buffer is not None:
+            frame_buffer.publish(roi, detections, boxes, frame_id, capture_time)
+        if not headless:
+            cv2.imshow(PREVIEW_WINDOW, render_overlay(roi, detections, boxes))
             if cv2.waitKey(1) & 0xFF == ord('q'): break
 
-    cap.release()
-    cv2.destroyAllWindows()
+    capture.release()
+    logger.close()
+    if recorder is not None:
+        recorder.close()
+    if not headless:
+        cv2.destroyAllWindows()
@@ -0,0 +1,24 @@
+import time
+import importlib
+import multiprocessing
+
+PRELOAD = ['numpy', 'cv2', 'serial', 'pygame', 'visual_module', 'robot_module', 'preview_module', 'blockstest']
+
+
+def start_context(preload=PRELOAD):
+    ctx = multiprocessing.get_context('forkserver')
+    ctx.set_forkserver_preload(preload)
+    from multiprocessing import forkserver
+    forkserver.ensure_running()
+    return ctx
+
+
+def mark_ready(ready):
+    if ready is not None:
+        ready.value = time.monotonic()
+
+
+def run_worker(target, *args, **kwargs):
+    module_name, func_name = target.split(':')
+    func = getattr(importlib.import_module(module_name), func_name)
+    return func(*args, **kwargs)